@@ -0,0 +1,139 @@
+# bench/bench_drive_upload.py
+#
+# Drive 업로드 처리량 벤치마크: DriveUploadPipeline 을 로컬 가짜 Drive 엔드포인트에 대고
+# 동시 업로드 수(workers)별 소요 시간·처리량·요청 수를 비교한다.
+# 가짜 서버는 요청마다 --latency 초를 지연시켜 실제 네트워크 왕복을 흉내 낸다
+# (multipart 단일 요청, resumable 세션 생성 + 308/200 청크, files.list·update 지원).
+#
+#   python bench/bench_drive_upload.py [--files 200] [--size-kb 60] [--large 2] [--latency 0.05]
+
+import argparse, json, os, tempfile, threading, time, uuid
+
+from stub_server import QuietHandler, serve
+
+import google.auth.credentials
+from googleapiclient.discovery import build
+from googleapiclient.http import build_http
+
+import google_auth_httplib2
+import main
+
+
+def make_handler(latency):
+    sessions, lock = {}, threading.Lock()
+    stats = {"requests": 0, "bytes": 0}
+
+    class Handler(QuietHandler):
+        def _read_body(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                stats["requests"] += 1
+                stats["bytes"] += len(body)
+            time.sleep(latency)
+            return body
+
+        def _created(self):
+            self.send_body(200, json.dumps({"id": uuid.uuid4().hex}).encode(), "application/json")
+
+        def do_GET(self):   # files.list
+            self._read_body()
+            self.send_body(200, b'{"files": []}', "application/json")
+
+        def do_POST(self):
+            self._read_body()
+            if "uploadType=resumable" in self.path:
+                sid = uuid.uuid4().hex
+                with lock:
+                    sessions[sid] = 0
+                host = self.headers["Host"]
+                self.send_body(200, b"", headers={"Location": f"http://{host}/upload/session/{sid}"})
+            else:   # uploadType=multipart
+                self._created()
+
+        def do_PATCH(self):   # files.update (같은 이름 파일 내용 갱신)
+            self._read_body()
+            self.send_body(200, json.dumps({"id": self.path.split("?")[0].rsplit("/", 1)[-1]}).encode(),
+                           "application/json")
+
+        def do_PUT(self):   # resumable 청크
+            body = self._read_body()
+            sid = self.path.rsplit("/", 1)[-1]
+            total = self.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+            with lock:
+                sessions[sid] += len(body)
+                stored = sessions[sid]
+            if total != "*" and stored >= int(total):
+                self._created()
+            else:
+                self.send_body(308, b"", headers={"Range": f"bytes=0-{stored - 1}"})
+
+    return Handler, stats
+
+
+def make_files(folder, count, size_kb, large):
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"shipment_label_document_{i:04d}.pdf")
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4\n" + os.urandom(size_kb * 1024))
+        paths.append(path)
+    for i in range(large):   # UPLOAD_SIMPLE_MAX_BYTES 초과 → resumable 경로
+        path = os.path.join(folder, f"shipment_manifest_document_big_{i}.pdf")
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4\n" + os.urandom(main.UPLOAD_SIMPLE_MAX_BYTES + main.UPLOAD_CHUNK_BYTES))
+        paths.append(path)
+    return paths
+
+
+def _local_http():
+    """build_http() 그대로 쓰되, googleapiclient 가 업로드 URL 을 항상 https 로 만들므로 stand-in 서버용으로 http 로 되돌림"""
+    http = build_http()
+    request = http.request
+
+    def plain_request(uri, *args, **kwargs):
+        return request(uri.replace("https://127.0.0.1", "http://127.0.0.1"), *args, **kwargs)
+
+    http.request = plain_request
+    return http
+
+
+def run(base, paths, workers, stats):
+    http = google_auth_httplib2.PooledAuthorizedHttp(
+        google.auth.credentials.AnonymousCredentials(), http_factory=_local_http, max_size=workers
+    )
+    main._DRIVE_SERVICE = build("drive", "v3", http=http, client_options={"api_endpoint": base},
+                                static_discovery=True)
+    stats.update(requests=0, bytes=0)
+
+    started = time.perf_counter()
+    pipeline = main.DriveUploadPipeline("bench-folder", workers=workers, skip_unchanged=True)
+    for path in paths:
+        pipeline.submit(path)
+    pipeline.close()
+    return time.perf_counter() - started, dict(stats)
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=200)
+    ap.add_argument("--size-kb", type=int, default=60)
+    ap.add_argument("--large", type=int, default=2)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--workers", default="1,4,8")
+    args = ap.parse_args()
+
+    handler, stats = make_handler(args.latency)
+    with tempfile.TemporaryDirectory() as folder, serve(handler) as base:
+        paths = make_files(folder, args.files, args.size_kb, args.large)
+        total_mb = sum(os.path.getsize(p) for p in paths) / 1e6
+        results = {int(w): run(base, paths, int(w), stats) for w in args.workers.split(",")}
+
+    print(f"\n파일 {len(paths)}개 ({total_mb:.1f} MB), 요청당 지연 {args.latency * 1000:.0f} ms")
+    base_t = results[min(results)][0]
+    for workers, (t, st) in results.items():
+        print(f"  workers={workers:<3} {t:6.2f}초  {len(paths) / t:6.1f} 파일/초  {total_mb / t:6.1f} MB/s  "
+              f"요청 {st['requests']}회  (x{base_t / t:.1f})")
+
+
+if __name__ == "__main__":
+    main_()
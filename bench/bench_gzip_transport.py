@@ -0,0 +1,118 @@
+# bench/bench_gzip_transport.py
+#
+# 압축 전송·커넥션 재사용 벤치마크: 큰 values JSON(get_all_values 응답)을 로컬 stand-in 서버에서 반복해 받으며
+# 기존 방식(요청마다 새 연결; requests 기본 User-Agent 에는 gzip 이 없어 비압축)과
+# 현재 방식(google_auth_httplib2.AuthorizedHttp / get_authorized_session: gzip 협상 + 연결 재사용)을 비교한다.
+# 서버는 Google API 처럼 Accept-Encoding 과 User-Agent 둘 다 gzip 일 때만 압축하고,
+# 새 연결마다 --handshake 초, 요청마다 --latency 초를 지연시키며 응답은 --mbps 대역폭으로 내려보낸다.
+#
+#   python bench/bench_gzip_transport.py [--rows 20000] [--requests 10] [--latency 0.03] [--mbps 50]
+
+import argparse, gzip, json, threading, time
+
+from stub_server import QuietHandler, serve
+from bench_stock_csv import make_sheet
+
+import google.auth.credentials
+import httplib2
+import requests
+
+import google_auth_httplib2
+import main
+
+
+def make_handler(body, latency, handshake, mbps):
+    compressed = gzip.compress(body)
+    stats, lock = {"connections": 0, "bytes": 0}, threading.Lock()
+    bytes_per_sec = mbps * 1e6 / 8
+
+    class Handler(QuietHandler):
+        def setup(self):   # 연결 1개당 1회 (TCP+TLS 핸드셰이크 흉내)
+            super().setup()
+            with lock:
+                stats["connections"] += 1
+            time.sleep(handshake)
+
+        def do_GET(self):
+            time.sleep(latency)
+            wants_gzip = ("gzip" in self.headers.get("Accept-Encoding", "")
+                          and "gzip" in self.headers.get("User-Agent", ""))
+            payload = compressed if wants_gzip else body
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(payload)))
+            if wants_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.end_headers()
+            with lock:   # 클라이언트가 응답을 다 받기 전에 집계 (다음 시나리오로 넘어가지 않도록)
+                stats["bytes"] += len(payload)
+            for i in range(0, len(payload), 64 * 1024):   # 대역폭 제한: 조각마다 전송 시간만큼 먼저 기다림
+                chunk = payload[i:i + 64 * 1024]
+                time.sleep(len(chunk) / bytes_per_sec)
+                self.wfile.write(chunk)
+
+    return Handler, stats, len(compressed)
+
+
+def httplib2_fresh(url):
+    http = httplib2.Http(timeout=60)   # 요청마다 새 Http → 새 연결 (httplib2 기본 User-Agent 는 gzip 포함)
+    _, content = http.request(url, "GET")
+    http.close()
+    return content
+
+
+def requests_fresh(url):
+    return requests.get(url, timeout=60).content
+
+
+def make_scenarios():
+    authed_http = google_auth_httplib2.AuthorizedHttp(google.auth.credentials.AnonymousCredentials())
+    main.get_google_credentials = google.auth.credentials.AnonymousCredentials   # stand-in 서버는 인증 없음
+    main._AUTHED_SESSION = None
+    session = main.get_authorized_session()
+    return {
+        "httplib2 요청마다 새 연결":       httplib2_fresh,
+        "AuthorizedHttp gzip·재사용":    lambda url: authed_http.request(url, "GET")[1],
+        "requests 새 연결·비압축":        requests_fresh,
+        "get_authorized_session gzip·재사용": lambda url: session.get(url, timeout=60).content,
+    }
+
+
+def run(fn, url, count, stats, expected):
+    stats.update(connections=0, bytes=0)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(count):
+        t = time.perf_counter()
+        content = fn(url)
+        latencies.append(time.perf_counter() - t)
+        assert json.loads(content) == expected, "응답 내용 불일치"
+    return time.perf_counter() - started, sorted(latencies), dict(stats)
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--requests", type=int, default=10)
+    ap.add_argument("--latency", type=float, default=0.03)
+    ap.add_argument("--handshake", type=float, default=0.06)
+    ap.add_argument("--mbps", type=float, default=50)
+    args = ap.parse_args()
+
+    values = {"range": "'재고 리스트'!A1:H", "majorDimension": "ROWS", "values": make_sheet(args.rows)}
+    body = json.dumps(values, ensure_ascii=False).encode("utf-8")
+    handler, stats, gz_size = make_handler(body, args.latency, args.handshake, args.mbps)
+
+    with serve(handler) as base:
+        url = base + "/v4/spreadsheets/bench-sheet/values/stock"
+        results = {name: run(fn, url, args.requests, stats, values) for name, fn in make_scenarios().items()}
+
+    print(f"\nvalues JSON {len(body) / 1e6:.1f} MB (gzip {gz_size / 1e6:.2f} MB), 요청 {args.requests}회, "
+          f"지연 {args.latency * 1000:.0f} ms + 핸드셰이크 {args.handshake * 1000:.0f} ms, {args.mbps:g} Mbps")
+    for name, (total, lat, st) in results.items():
+        print(f"  {name:<36} 총 {total:6.2f}초  p50 {lat[len(lat) // 2] * 1000:7.1f} ms  "
+              f"max {lat[-1] * 1000:7.1f} ms  전송 {st['bytes'] / 1e6:6.1f} MB  연결 {st['connections']}개")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,129 @@
+# bench/bench_page_transition.py
+#
+# 페이지 전환 벤치마크: 로컬 stand-in Shipments 화면(이미지·웹폰트가 많은 검색 페이지)을 실제 Chrome 으로 열어
+# 기존 방식(보이는 브라우저, 모든 리소스 로드)과 fast_crawl 방식(_chrome_options(light=True) 의 headless·이미지 끔·eager,
+# + block_heavy_resources 로 폰트 등 차단)의 화면 진입(open_shipment_search)·발주번호 검색(search_shipment) 시간을 비교한다.
+# 서버는 리소스마다 --asset-latency 초, 검색 API 마다 --search-latency 초를 지연시킨다.
+# Chrome/ChromeDriver 를 띄울 수 없는 시나리오(예: 디스플레이 없는 서버의 보이는 브라우저)는 건너뛴다.
+#
+#   python bench/bench_page_transition.py [--loads 5] [--searches 20] [--images 30] [--asset-latency 0.05]
+
+import argparse, json, tempfile, threading, time, types
+from urllib.parse import parse_qs, urlsplit
+
+from stub_server import QuietHandler, serve
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+import main
+
+PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Shipments</title>
+<style>
+@font-face {{ font-family: portal; src: url("/static/portal.woff2") format("woff2"); }}
+body {{ font-family: portal, sans-serif; }}
+</style></head>
+<body>
+<header>{images}</header>
+<input id="purchaseOrderSeq"><button id="shipment-search-btn">검색</button>
+<table id="parcel-tab"><tbody><tr><td colspan="8">조회 결과가 없습니다.</td></tr></tbody></table>
+<script>
+document.getElementById("shipment-search-btn").onclick = async () => {{
+  const po = document.getElementById("purchaseOrderSeq").value;
+  const res = await (await fetch("/api/search?po=" + encodeURIComponent(po))).json();
+  document.querySelector("#parcel-tab tbody").innerHTML =
+    `<tr><td>${{res.shipment}}</td><td>${{po}}</td><td>센터</td><td>1</td></tr>`;
+}};
+</script>
+</body></html>
+"""
+
+
+def make_handler(images, asset_kb, asset_latency, search_latency):
+    page = PAGE.format(images="".join(f'<img src="/static/banner{i}.png" width="64">' for i in range(images)))
+    asset = b"\0" * (asset_kb * 1024)
+    stats, lock = {"assets": 0, "bytes": 0}, threading.Lock()
+
+    class Handler(QuietHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/ibs/asn/active":
+                self.send_body(200, page.encode("utf-8"), "text/html; charset=utf-8")
+            elif url.path.startswith("/static/"):
+                with lock:
+                    stats["assets"] += 1
+                    stats["bytes"] += len(asset)
+                time.sleep(asset_latency)
+                content_type = "font/woff2" if url.path.endswith(".woff2") else "image/png"
+                self.send_body(200, asset, content_type, {"Cache-Control": "no-store"})
+            elif url.path == "/api/search":
+                time.sleep(search_latency)
+                po_no = parse_qs(url.query)["po"][0]
+                self.send_body(200, json.dumps({"shipment": f"S-{po_no}"}).encode(), "application/json")
+            else:
+                self.send_body(404, b"", "text/plain")
+
+    return Handler, stats
+
+
+def make_scenarios(download_dir):
+    app = types.SimpleNamespace(download_dir=download_dir)   # _chrome_options 는 download_dir 만 사용
+    return {
+        "보이는 브라우저 (기존)":        (main.OrderApp._chrome_options(app), False),
+        "headless light":             (main.OrderApp._chrome_options(app, light=True), False),
+        "headless light + 리소스 차단": (main.OrderApp._chrome_options(app, light=True), True),
+    }
+
+
+def run(options, block, loads, searches, stats):
+    driver = webdriver.Chrome(options=options)
+    try:
+        if block:
+            main.block_heavy_resources(driver)
+        stats.update(assets=0, bytes=0)
+        opens, lookups = [], []
+        search_input = None
+        for _ in range(loads):
+            t = time.perf_counter()
+            search_input = main.open_shipment_search(driver)
+            opens.append(time.perf_counter() - t)
+        for i in range(searches):
+            po_no = str(100000 + i)
+            t = time.perf_counter()
+            assert main.search_shipment(driver, search_input, po_no) == f"S-{po_no}", "검색 결과 불일치"
+            lookups.append(time.perf_counter() - t)
+        return sorted(opens), sorted(lookups), dict(stats)
+    finally:
+        driver.quit()
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--loads", type=int, default=5)
+    ap.add_argument("--searches", type=int, default=20)
+    ap.add_argument("--images", type=int, default=30)
+    ap.add_argument("--asset-kb", type=int, default=40)
+    ap.add_argument("--asset-latency", type=float, default=0.05)
+    ap.add_argument("--search-latency", type=float, default=0.1)
+    args = ap.parse_args()
+
+    handler, stats = make_handler(args.images, args.asset_kb, args.asset_latency, args.search_latency)
+    results = {}
+    with serve(handler) as base, tempfile.TemporaryDirectory() as download_dir:
+        main.PORTAL_BASE_URL = base
+        for name, (options, block) in make_scenarios(download_dir).items():
+            try:
+                results[name] = run(options, block, args.loads, args.searches, stats)
+            except WebDriverException as e:
+                print(f"[건너뜀] {name}: Chrome 실행 실패 ({e.msg or e})")
+
+    print(f"\nShipments 화면 (이미지 {args.images}개 + 웹폰트, 각 {args.asset_kb} KB·{args.asset_latency * 1000:.0f} ms), "
+          f"화면 진입 {args.loads}회, 검색 {args.searches}회 (API {args.search_latency * 1000:.0f} ms)")
+    for name, (opens, lookups, st) in results.items():
+        print(f"  {name:<24} 진입 p50 {opens[len(opens) // 2] * 1000:7.1f} ms  max {opens[-1] * 1000:7.1f} ms  "
+              f"검색 p50 {lookups[len(lookups) // 2] * 1000:7.1f} ms  리소스 {st['assets']}건 {st['bytes'] / 1e6:5.1f} MB")
+
+
+if __name__ == "__main__":
+    main_()
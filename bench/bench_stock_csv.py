@@ -0,0 +1,101 @@
+# bench/bench_stock_csv.py
+#
+# 재고 로딩 벤치마크: gspread get_all_values(JSON) 경로 vs CSV export 스트리밍 경로 (load_stock_df_csv).
+# 큰 합성 시트를 로컬 stand-in 서버가 두 형식으로 내려주고, 각 경로의 소요 시간·최대 메모리·결과 행 수를 비교한다.
+#
+#   python bench/bench_stock_csv.py [--rows 200000] [--repeat 3]
+
+import argparse, csv, io, json, random, time, tracemalloc
+
+from stub_server import QuietHandler, serve
+
+import pandas as pd
+import requests
+from gspread import http_client
+
+import main
+
+HEADER = ["SKU", "상품명", "바코드", "수량", "사업자 번호", "로케이션", "비고", "수정일"]
+SHEET_ID = "bench-sheet"
+
+
+def make_sheet(rows: int, biz_count: int = 50) -> list[list[str]]:
+    rnd = random.Random(0)
+    values = [HEADER]
+    for i in range(rows):
+        values.append([
+            f"SKU{i:07d}", f"상품 {i} 테스트 이름", f"R{rnd.randrange(10**11, 10**12)}",
+            str(rnd.randrange(0, 500)), f"{1000000000 + rnd.randrange(biz_count)}",
+            f"A-{rnd.randrange(100):02d}", "", "2026-01-01",
+        ])
+    return values
+
+
+def make_handler(values):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(values)
+    csv_body = buf.getvalue().encode("utf-8")
+    json_body = json.dumps({"range": "'재고 리스트'!A1:H", "majorDimension": "ROWS",
+                            "values": values}, ensure_ascii=False).encode("utf-8")
+
+    class Handler(QuietHandler):
+        def do_GET(self):
+            if self.path.startswith("/export"):
+                self.send_body(200, csv_body, "text/csv")
+            else:   # /v4/spreadsheets/<id>/values/<range>
+                self.send_body(200, json_body, "application/json")
+
+    return Handler, len(csv_body), len(json_body)
+
+
+def gspread_path(client, biz_num):
+    """기존 경로: get_all_values → DataFrame 전체 생성 → 사업자번호 필터"""
+    data = client.values_get(SHEET_ID, "'재고 리스트'").get("values", [])
+    df = pd.DataFrame(data[1:], columns=data[0]).fillna("")
+    sku_col, name_col, bc_col, qty_col, biz_col = main._find_stock_columns(df.columns)
+    hit = df[df[biz_col].astype(str).str.strip() == biz_num]
+    return hit[[sku_col, name_col, bc_col, qty_col]]
+
+
+def measure(fn, repeat):
+    times, peak = [], 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(times), peak, len(result)
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    values = make_sheet(args.rows)
+    biz_num = values[1][4]
+    handler, csv_size, json_size = make_handler(values)
+
+    with serve(handler) as base:
+        session = requests.Session()
+        main._AUTHED_SESSION = session   # 인증 세션 대신 일반 세션 (stand-in 서버는 인증 없음)
+        http_client.SPREADSHEET_VALUES_URL = base + "/v4/spreadsheets/%s/values/%s"
+        client = http_client.HTTPClient(auth=None, session=session)
+
+        results = {
+            "gspread get_all_values": measure(lambda: gspread_path(client, biz_num), args.repeat),
+            "CSV 스트리밍":           measure(lambda: main.load_stock_df_csv(biz_num, url=base + "/export"),
+                                          args.repeat),
+        }
+
+    print(f"합성 시트 {args.rows:,}행 (JSON {json_size / 1e6:.1f} MB, CSV {csv_size / 1e6:.1f} MB), "
+          f"최소 소요 시간 / {args.repeat}회")
+    for name, (t, peak, n) in results.items():
+        print(f"  {name:<24} {t:6.2f}초   최대 메모리 {peak / 1e6:7.1f} MB   결과 {n}행")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,41 @@
+# bench/stub_server.py
+#
+# 벤치마크용 로컬 stand-in HTTP 서버 (Google API / 쿠팡 포털 대신 응답).
+# 핸들러 클래스를 넘기면 백그라운드 스레드에서 띄우고 base URL 을 돌려준다.
+
+import contextlib, http.server, os, sys, threading
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:   # 스크립트로 직접 실행해도 main 등 루트 모듈 import 가능
+    sys.path.insert(0, ROOT_DIR)
+
+
+class QuietHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive (커넥션 재사용 측정용)
+    disable_nagle_algorithm = True  # TCP_NODELAY: 재사용 연결이 delayed ACK(~40ms) 를 요청마다 물지 않도록
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, status, body: bytes, content_type="application/octet-stream", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@contextlib.contextmanager
+def serve(handler_cls):
+    """with serve(Handler) as base_url: ..."""
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+    srv.daemon_threads = True
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{srv.server_port}"
+    finally:
+        srv.shutdown()
+        srv.server_close()
@@ -16,8 +16,17 @@
 
 from __future__ import absolute_import
 
+import bisect
+import contextlib
+import datetime
 import http.client
 import logging
+import queue
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
 
 from google.auth import exceptions
 from google.auth import transport
@@ -27,6 +36,173 @@ import httplib2
 _LOGGER = logging.getLogger(__name__)
 # Properties present in file-like streams / buffers.
 _STREAM_PROPERTIES = ("read", "seek", "tell")
+# Upper bounds (seconds) of the request latency histogram buckets.
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+# Path segments that look like resource IDs (Drive file IDs, spreadsheet
+# keys, ...) are collapsed so metrics aggregate per endpoint.
+_ID_SEGMENT = re.compile(r"^(?=.*\d)[A-Za-z0-9_-]{16,}$|^\d+$")
+
+
+# Google APIs only gzip a response when the request both accepts gzip and
+# carries "gzip" in its User-Agent.
+_GZIP_USER_AGENT = "google-auth-httplib2 (gzip)"
+# Socket timeout for default HTTP objects, so a dead kept-alive connection
+# fails fast instead of hanging the request.
+_DEFAULT_TIMEOUT = 60
+# Methods that may be repeated without changing the result (RFC 7231, 4.2.2).
+_IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"])
+
+
+def _add_compression_headers(headers):
+    """Returns a copy of ``headers`` that negotiates a compressed response.
+
+    Range requests are left without ``accept-encoding``, matching httplib2,
+    because partial content cannot be decoded independently.
+    """
+    headers = dict(headers) if headers else {}
+    keys = {key.lower(): key for key in headers}
+    if "accept-encoding" not in keys and "range" not in keys:
+        headers["accept-encoding"] = "gzip, deflate"
+    ua_key = keys.get("user-agent")
+    if ua_key is None:
+        headers["user-agent"] = _GZIP_USER_AGENT
+    elif "gzip" not in headers[ua_key]:
+        headers[ua_key] = headers[ua_key] + " (gzip)"
+    return headers
+
+
+def is_retry_safe(status, method, headers=None):
+    """Returns True if a request throttled with ``status`` may be resent unchanged.
+
+    A 429 rejects the request for exceeding the quota before it is
+    executed, so it can always be resent. A 503 may come after the server
+    acted on the request, so only idempotent methods are resent: resending
+    a POST such as ``files.create`` could create a duplicate file. After a
+    503, a resumable upload chunk (a PUT whose ``Content-Range`` names a
+    byte range) is not resent either; the uploader must first ask how many
+    bytes were stored. Status queries (``Content-Range: bytes */...``) are
+    always safe.
+    """
+    if status == 429:
+        return True
+    if method.upper() not in _IDEMPOTENT_METHODS:
+        return False
+    for key, value in (headers or {}).items():
+        if key.lower() == "content-range":
+            return value.replace(" ", "").startswith("bytes*/")
+    return True
+
+
+def _endpoint_key(method, uri):
+    """Returns ``"METHOD host/path"`` with ID-like path segments collapsed."""
+    parts = urlsplit(uri)
+    path = "/".join(
+        "{id}" if _ID_SEGMENT.match(seg) else seg for seg in parts.path.split("/")
+    )
+    return "{} {}{}".format(method, parts.netloc, path)
+
+
+def _body_size(body):
+    """Returns the request body size in bytes, or 0 if it cannot be known."""
+    if isinstance(body, bytes):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    return 0
+
+
+#: Status recorded for requests that raised instead of returning a response.
+ERROR_STATUS = "error"
+
+
+class MetricsRegistry(object):
+    """In-process registry of HTTP request metrics, keyed by endpoint.
+
+    For every endpoint it keeps the request count, status code counts,
+    bytes sent and received, credential refresh retries and a latency
+    histogram. All methods are thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _entry(self, endpoint):
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = {
+                "requests": 0,
+                "statuses": {},
+                "bytes_sent": 0,
+                "bytes_received": 0,
+                "refresh_retries": 0,
+                "latency_total": 0.0,
+                "latency_max": 0.0,
+                "latency_buckets": [0] * len(_LATENCY_BUCKETS),
+            }
+            self._endpoints[endpoint] = entry
+        return entry
+
+    def record(self, endpoint, status, latency, bytes_sent, bytes_received):
+        """Records one HTTP round trip.
+
+        ``status`` is the response status code, or :data:`ERROR_STATUS`
+        when the transport raised before a response arrived.
+        """
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry["requests"] += 1
+            entry["statuses"][status] = entry["statuses"].get(status, 0) + 1
+            entry["bytes_sent"] += bytes_sent
+            entry["bytes_received"] += bytes_received
+            entry["latency_total"] += latency
+            entry["latency_max"] = max(entry["latency_max"], latency)
+            entry["latency_buckets"][bisect.bisect_left(_LATENCY_BUCKETS, latency)] += 1
+
+    def record_refresh(self, endpoint):
+        """Records a retry caused by a credential refresh."""
+        with self._lock:
+            self._entry(endpoint)["refresh_retries"] += 1
+
+    def snapshot(self):
+        """Returns a deep copy of the metrics as plain dicts.
+
+        ``latency_buckets`` maps each bucket's upper bound (as a string, so
+        the result is JSON-serializable) to its count.
+        """
+        with self._lock:
+            result = {}
+            for endpoint, entry in self._endpoints.items():
+                copied = dict(entry, statuses=dict(entry["statuses"]))
+                copied["latency_buckets"] = {
+                    "le_{}".format(bound): count
+                    for bound, count in zip(_LATENCY_BUCKETS, entry["latency_buckets"])
+                }
+                result[endpoint] = copied
+            return result
+
+    def reset(self):
+        """Discards all recorded metrics."""
+        with self._lock:
+            self._endpoints.clear()
+
+    def format(self):
+        """Returns a human readable summary, one line per endpoint."""
+        lines = []
+        for endpoint, m in sorted(self.snapshot().items()):
+            avg = m["latency_total"] / m["requests"] if m["requests"] else 0.0
+            lines.append(
+                "{}: {} req, status {}, avg {:.3f}s, max {:.3f}s, "
+                "sent {} B, recv {} B, refresh retries {}".format(
+                    endpoint, m["requests"], m["statuses"], avg, m["latency_max"],
+                    m["bytes_sent"], m["bytes_received"], m["refresh_retries"],
+                )
+            )
+        return "\n".join(lines)
+
+
+#: Registry shared by every :class:`AuthorizedHttp` in the process.
+metrics = MetricsRegistry()
 
 
 class _Response(transport.Response):
@@ -117,7 +293,11 @@ class Request(transport.Request):
         try:
             _LOGGER.debug("Making request: %s %s", method, url)
             response, data = self.http.request(
-                url, method=method, body=body, headers=headers, **kwargs
+                url,
+                method=method,
+                body=body,
+                headers=_add_compression_headers(headers),
+                **kwargs
             )
             return _Response(response, data)
         # httplib2 should catch the lower http error, this is a bug and
@@ -127,8 +307,172 @@ class Request(transport.Request):
 
 
 def _make_default_http():
-    """Returns a default httplib2.Http instance."""
-    return httplib2.Http()
+    """Returns a default httplib2.Http instance.
+
+    httplib2 keeps one persistent connection per host on each instance, so
+    reusing the instance (or pooling instances, see :class:`_HttpPool`)
+    reuses TLS connections across calls.
+    """
+    return httplib2.Http(timeout=_DEFAULT_TIMEOUT)
+
+
+class BackgroundRefresher(object):
+    """Refreshes credentials shortly before they expire, on a daemon thread.
+
+    With a refresher running, requests keep using the current (still valid)
+    token while the new one is fetched, so they neither stall on a blocking
+    refresh nor pay for a failed round trip after expiry.
+
+    Args:
+        credentials (google.auth.credentials.Credentials): The credentials
+            to keep fresh.
+        request (google.auth.transport.Request): The request adapter used to
+            refresh. It must not be shared with another thread unless the
+            underlying transport is thread-safe.
+        margin (float): Refresh this many seconds before expiry.
+        lock (threading.Lock): Held while refreshing, so that reactive
+            refreshes elsewhere can be serialized with this one.
+        on_refresh (Callable[[Credentials], None]): Called after every
+            successful refresh, for example to persist the token.
+        retry_interval (float): Seconds to wait after a failed refresh.
+    """
+
+    def __init__(
+        self,
+        credentials,
+        request,
+        margin=300,
+        lock=None,
+        on_refresh=None,
+        retry_interval=30,
+    ):
+        self.credentials = credentials
+        self._request = request
+        self._margin = margin
+        self._lock = lock or threading.Lock()
+        self._on_refresh = on_refresh
+        self._retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Starts the refresh thread and returns ``self``."""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Asks the refresh thread to exit."""
+        self._stop.set()
+
+    def _seconds_until_refresh(self):
+        """Seconds until the next refresh is due, or None if never."""
+        if not self.credentials.token:
+            return 0
+        expiry = self.credentials.expiry
+        if expiry is None:
+            return None
+        remaining = (expiry - datetime.datetime.utcnow()).total_seconds()
+        return remaining - self._margin
+
+    def _refresh_due(self):
+        """True if the token needs refreshing now (never for non-expiring ones)."""
+        wait = self._seconds_until_refresh()
+        return wait is not None and wait <= 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self._seconds_until_refresh()
+            if wait is None:
+                return
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            try:
+                with self._lock:
+                    # Another thread may have refreshed while we waited.
+                    if self._refresh_due():
+                        self.credentials.refresh(self._request)
+                if self._on_refresh is not None:
+                    self._on_refresh(self.credentials)
+                if self._refresh_due():
+                    # Token lifetime shorter than the margin; don't spin.
+                    self._stop.wait(self._retry_interval)
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.warning("Background credential refresh failed: %s", exc)
+                self._stop.wait(self._retry_interval)
+
+
+class AdaptiveRateLimiter(object):
+    """Token-bucket rate limiter that adapts to throttling responses (AIMD).
+
+    Every request takes a token before it is sent. Each successful response
+    raises the rate additively by about ``increase`` requests per second
+    per second. A 429 or 503 cuts the rate by the ``decrease`` factor and
+    empties the bucket. One instance can be shared by every client that
+    draws on the same quota, so together they run close to the quota
+    without tripping it.
+
+    Args:
+        rate (float): Initial requests per second.
+        burst (int): Bucket capacity, i.e. the largest burst allowed.
+        min_rate (float): Lower bound for the adapted rate.
+        max_rate (float): Upper bound for the adapted rate.
+        increase (float): Additive increase, in requests/second gained per
+            second of successful traffic.
+        decrease (float): Multiplicative decrease factor on throttling.
+        max_retries (int): How many times a throttled request is retried by
+            :class:`AuthorizedHttp` / :class:`PooledAuthorizedHttp`. Only
+            requests accepted by :func:`is_retry_safe` are retried.
+    """
+
+    THROTTLE_STATUS_CODES = (429, 503)
+
+    def __init__(
+        self,
+        rate=5.0,
+        burst=10,
+        min_rate=0.2,
+        max_rate=50.0,
+        increase=0.5,
+        decrease=0.5,
+        max_retries=5,
+    ):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until the caller may send one request."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Reserve a token; a negative balance is the caller's wait time.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+    def feedback(self, status):
+        """Adapts the rate to a response status code."""
+        with self._lock:
+            if status in self.THROTTLE_STATUS_CODES:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._tokens = min(self._tokens, 0.0)
+                _LOGGER.info("Throttled (%s); rate lowered to %.2f req/s.", status, self.rate)
+            elif status < 400:
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def retry_delay(self, attempt):
+        """Exponential backoff with jitter before retry number ``attempt``."""
+        return min(32.0, 2 ** attempt) * (0.5 + random.random() / 2)
 
 
 class AuthorizedHttp(object):
@@ -158,6 +502,10 @@ class AuthorizedHttp(object):
         http=None,
         refresh_status_codes=transport.DEFAULT_REFRESH_STATUS_CODES,
         max_refresh_attempts=transport.DEFAULT_MAX_REFRESH_ATTEMPTS,
+        background_refresh=False,
+        refresh_margin=300,
+        rate_limiter=None,
+        refresh_lock=None,
     ):
         """
         Args:
@@ -171,6 +519,17 @@ class AuthorizedHttp(object):
                 should be retried.
             max_refresh_attempts (int): The maximum number of times to attempt
                 to refresh the credentials and retry the request.
+            background_refresh (bool): Start a :class:`BackgroundRefresher`
+                that renews the credentials ``refresh_margin`` seconds before
+                they expire. It uses its own HTTP object.
+            refresh_margin (float): See ``background_refresh``.
+            rate_limiter (AdaptiveRateLimiter): Optional limiter consulted
+                before every request and fed every response status.
+                Throttled requests (429/503) are retried with backoff.
+            refresh_lock (threading.Lock): Held while refreshing. Pass the
+                lock of a :class:`BackgroundRefresher` (or any other code
+                refreshing the same credentials) to serialize the refreshes.
+                Defaults to a new lock.
         """
 
         if http is None:
@@ -183,11 +542,43 @@ class AuthorizedHttp(object):
         # Request instance used by internal methods (for example,
         # credentials.refresh).
         self._request = Request(self.http)
+        self._refresh_lock = refresh_lock or threading.Lock()
+        self._rate_limiter = rate_limiter
+        self._refresher = None
+        if background_refresh:
+            self._refresher = BackgroundRefresher(
+                credentials,
+                Request(_make_default_http()),
+                margin=refresh_margin,
+                lock=self._refresh_lock,
+            ).start()
 
     def close(self):
         """Calls httplib2's Http.close"""
+        if self._refresher is not None:
+            self._refresher.stop()
         self.http.close()
 
+    def _refresh(self, stale_token):
+        """Refreshes the credentials, serialized with background refreshes.
+
+        ``stale_token`` is the token the failed request used.
+        """
+        with self._refresh_lock:
+            self.credentials.refresh(self._request)
+
+    def _send(self, uri, method, body, headers, redirections, connection_type, **kwargs):
+        """Sends one request on the underlying transport."""
+        return self.http.request(
+            uri,
+            method,
+            body=body,
+            headers=headers,
+            redirections=redirections,
+            connection_type=connection_type,
+            **kwargs
+        )
+
     def request(
         self,
         uri,
@@ -201,12 +592,18 @@ class AuthorizedHttp(object):
         """Implementation of httplib2's Http.request."""
 
         _credential_refresh_attempt = kwargs.pop("_credential_refresh_attempt", 0)
+        _throttle_attempt = kwargs.pop("_throttle_attempt", 0)
 
         # Make a copy of the headers. They will be modified by the credentials
         # and we want to pass the original headers if we recurse.
-        request_headers = headers.copy() if headers is not None else {}
+        request_headers = _add_compression_headers(headers)
 
+        # Refresh an expired token under the lock, so concurrent requests and
+        # the background refresher don't exchange it at the same time.
+        if not self.credentials.valid:
+            self._refresh(self.credentials.token)
         self.credentials.before_request(self._request, method, uri, request_headers)
+        used_token = self.credentials.token
 
         # Check if the body is a file-like stream, and if so, save the body
         # stream position so that it can be restored in case of refresh.
@@ -215,15 +612,57 @@ class AuthorizedHttp(object):
             body_stream_position = body.tell()
 
         # Make the request.
-        response, content = self.http.request(
-            uri,
-            method,
-            body=body,
-            headers=request_headers,
-            redirections=redirections,
-            connection_type=connection_type,
-            **kwargs
-        )
+        endpoint = _endpoint_key(method, uri)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        started = time.perf_counter()
+        status, content = ERROR_STATUS, None
+        try:
+            response, content = self._send(
+                uri, method, body, request_headers, redirections, connection_type, **kwargs
+            )
+            status = response.status
+        finally:
+            # Transport failures (timeouts, resets) are recorded too.
+            metrics.record(
+                endpoint,
+                status,
+                time.perf_counter() - started,
+                _body_size(body),
+                len(content or b""),
+            )
+
+        # Back off and retry requests rejected for exceeding the quota.
+        if self._rate_limiter is not None:
+            self._rate_limiter.feedback(response.status)
+            if (
+                response.status in self._rate_limiter.THROTTLE_STATUS_CODES
+                and _throttle_attempt < self._rate_limiter.max_retries
+                and is_retry_safe(response.status, method, headers)
+            ):
+                delay = self._rate_limiter.retry_delay(_throttle_attempt)
+                _LOGGER.info(
+                    "Retrying %s after a %s response in %.1fs. Attempt %s/%s.",
+                    endpoint,
+                    response.status,
+                    delay,
+                    _throttle_attempt + 1,
+                    self._rate_limiter.max_retries,
+                )
+                time.sleep(delay)
+                if body_stream_position is not None:
+                    body.seek(body_stream_position)
+                return self.request(
+                    uri,
+                    method,
+                    body=body,
+                    headers=headers,
+                    redirections=redirections,
+                    connection_type=connection_type,
+                    _credential_refresh_attempt=_credential_refresh_attempt,
+                    _throttle_attempt=_throttle_attempt + 1,
+                    **kwargs
+                )
 
         # If the response indicated that the credentials needed to be
         # refreshed, then refresh the credentials and re-attempt the
@@ -242,7 +681,8 @@ class AuthorizedHttp(object):
                 self._max_refresh_attempts,
             )
 
-            self.credentials.refresh(self._request)
+            self._refresh(used_token)
+            metrics.record_refresh(endpoint)
 
             # Restore the body's stream position if needed.
             if body_stream_position is not None:
@@ -257,6 +697,7 @@ class AuthorizedHttp(object):
                 redirections=redirections,
                 connection_type=connection_type,
                 _credential_refresh_attempt=_credential_refresh_attempt + 1,
+                _throttle_attempt=_throttle_attempt,
                 **kwargs
             )
 
@@ -305,3 +746,133 @@ class AuthorizedHttp(object):
     def redirect_codes(self, value):
         """Proxy to httplib2.Http.redirect_codes."""
         self.http.redirect_codes = value
+
+
+class _HttpPool(object):
+    """A pool of :class:`httplib2.Http` instances.
+
+    ``httplib2.Http`` is not thread-safe, so each request checks out an
+    instance for its exclusive use and returns it afterwards. Instances are
+    reused LIFO so the most recently used (and therefore most likely still
+    connected) instance is handed out first.
+
+    Args:
+        http_factory (Callable[[], httplib2.Http]): Creates new instances.
+        max_size (int): The maximum number of instances. Once reached,
+            :meth:`checkout` blocks until an instance is returned.
+    """
+
+    def __init__(self, http_factory=None, max_size=10):
+        self._factory = http_factory or _make_default_http
+        self._max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._created = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def checkout(self):
+        """Context manager yielding an :class:`httplib2.Http` instance."""
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            http = None
+            with self._lock:
+                if len(self._created) < self._max_size:
+                    http = self._factory()
+                    self._created.append(http)
+            if http is None:
+                http = self._idle.get()
+        try:
+            yield http
+        finally:
+            self._idle.put(http)
+
+    def request(self, *args, **kwargs):
+        """Make a request on a checked-out instance.
+
+        This lets the pool be used wherever a single :class:`httplib2.Http`
+        is expected, for example by :class:`Request`.
+        """
+        with self.checkout() as http:
+            return http.request(*args, **kwargs)
+
+    def close(self):
+        """Calls httplib2's Http.close on every instance."""
+        with self._lock:
+            for http in self._created:
+                http.close()
+
+
+class PooledAuthorizedHttp(AuthorizedHttp):
+    """A thread-safe variant of :class:`AuthorizedHttp`.
+
+    Requests run on :class:`httplib2.Http` instances checked out from a
+    pool, so one instance can be shared by many threads (for example by a
+    ``googleapiclient`` service used from upload workers). Persistent
+    connections stay with their pooled instance between requests.
+
+    Credential refreshes are serialized: when several threads get a 401 for
+    the same token, only the first one refreshes and the others retry with
+    the new token.
+    """
+
+    def __init__(
+        self,
+        credentials,
+        http_factory=None,
+        max_size=10,
+        refresh_status_codes=transport.DEFAULT_REFRESH_STATUS_CODES,
+        max_refresh_attempts=transport.DEFAULT_MAX_REFRESH_ATTEMPTS,
+        background_refresh=False,
+        refresh_margin=300,
+        rate_limiter=None,
+        refresh_lock=None,
+    ):
+        """
+        Args:
+            credentials (google.auth.credentials.Credentials): The credentials
+                to add to the request.
+            http_factory (Callable[[], httplib2.Http]): Creates the pooled
+                HTTP objects. Defaults to :func:`_make_default_http`.
+            max_size (int): The maximum number of pooled HTTP objects, i.e.
+                the maximum number of concurrent requests.
+            refresh_status_codes (Sequence[int]): Which HTTP status codes
+                indicate that credentials should be refreshed and the request
+                should be retried.
+            max_refresh_attempts (int): The maximum number of times to attempt
+                to refresh the credentials and retry the request.
+            background_refresh (bool): See :class:`AuthorizedHttp`.
+            refresh_margin (float): See ``background_refresh``.
+            rate_limiter (AdaptiveRateLimiter): See :class:`AuthorizedHttp`.
+            refresh_lock (threading.Lock): See :class:`AuthorizedHttp`.
+        """
+        self._pool = _HttpPool(http_factory, max_size)
+        super(PooledAuthorizedHttp, self).__init__(
+            credentials,
+            http=self._pool,
+            refresh_status_codes=refresh_status_codes,
+            max_refresh_attempts=max_refresh_attempts,
+            background_refresh=background_refresh,
+            refresh_margin=refresh_margin,
+            rate_limiter=rate_limiter,
+            refresh_lock=refresh_lock,
+        )
+
+    def _refresh(self, stale_token):
+        """Refresh the credentials unless another thread already did."""
+        with self._refresh_lock:
+            if self.credentials.token == stale_token or not self.credentials.valid:
+                self.credentials.refresh(self._request)
+
+    def _send(self, uri, method, body, headers, redirections, connection_type, **kwargs):
+        """Sends one request on a checked-out pooled HTTP object."""
+        with self._pool.checkout() as http:
+            return http.request(
+                uri,
+                method,
+                body=body,
+                headers=headers,
+                redirections=redirections,
+                connection_type=connection_type,
+                **kwargs
+            )
@@ -1,5 +1,5 @@
 from PySide6.QtGui import QCloseEvent
-import sys, os, json, zipfile, tempfile, random, threading, shutil, time, re
+import sys, os, json, zipfile, tempfile, random, threading, shutil, time, re, base64, hashlib, queue
 from datetime import datetime
 import openpyxl
 import requests
@@ -18,9 +18,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import (
+    NoSuchElementException, StaleElementReferenceException, TimeoutException
+)
 
 
 from order_processor import process_order_folder, is_confirmed_excel
+import stock_mirror
+import shipment_cache
 import subprocess
 
 import gspread
@@ -28,16 +33,26 @@ import google.auth
 import google.auth.transport.requests
 import google.oauth2.service_account
 from google.oauth2.service_account import Credentials
+try:
+    from cryptography.fernet import Fernet
+except ImportError:   # cryptography 미설치 시 토큰 디스크 캐시 생략
+    Fernet = None
 
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, build_http
+import google_auth_httplib2
 from pathlib import Path
 from random import randint
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
 
 #SHEET_ID_MASTER = "1-HB7z7TmWoBhXPCXjp32biuYKB4ITxQfwdhQ_dO52l4" #메인 시트
 SHEET_ID_MASTER = "18JG34ZOg1VyWeQQTz4vA3M9fh1GkjFBfD3xUfV9XBOM" #회사 내부용 시트
 
+MIRROR_MAX_AGE_SEC = 60   # 이 시간 안에 동기화한 미러는 시트 재다운로드 없이 바로 조회
+
 STOCK_SHEET_CSV = (
     f"https://docs.google.com/spreadsheets/d/{SHEET_ID_MASTER}/export"
     "?format=csv&gid=679677814" 
@@ -55,7 +70,104 @@ def load_credentials():
     with open(cred_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-GOOGLE_CREDENTIALS_DICT = load_credentials()
+_CREDENTIALS_DICT = None
+
+def get_credentials_dict():
+    """google_credentials.json 은 처음 필요할 때 1회만 읽음 (import 만으로는 파일이 없어도 됨 → 테스트·벤치에서 import 가능)"""
+    global _CREDENTIALS_DICT
+    if _CREDENTIALS_DICT is None:
+        _CREDENTIALS_DICT = load_credentials()
+    return _CREDENTIALS_DICT
+
+GOOGLE_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+TOKEN_REFRESH_MARGIN_SEC = 300   # 만료 5분 전에 백그라운드에서 미리 갱신
+
+_CREDENTIALS = None
+_CREDENTIALS_LOCK = threading.Lock()
+# 토큰 교환은 이 잠금 하나로 직렬화: 백그라운드 갱신·Drive(httplib2) 401 갱신·Sheets(requests) 갱신이 동시에 일어나지 않음
+_TOKEN_REFRESH_LOCK = threading.RLock()
+
+def _token_cache_path() -> str:
+    if getattr(sys, 'frozen', False):
+        return os.path.join(os.path.dirname(sys.executable), "google_token.cache")
+    return os.path.join(os.path.dirname(__file__), "google_token.cache")
+
+def _token_cipher():
+    """서비스 계정 키에서 파생한 Fernet 키 (cryptography 없으면 디스크 캐시 사용 안 함)"""
+    if Fernet is None:
+        return None
+    info = get_credentials_dict()
+    secret = (info.get("private_key_id", "") + info["private_key"]).encode()
+    return Fernet(base64.urlsafe_b64encode(hashlib.sha256(secret).digest()))
+
+def _load_cached_token(creds):
+    cipher, path = _token_cipher(), _token_cache_path()
+    if cipher is None or not os.path.exists(path):
+        return
+    try:
+        with open(path, "rb") as f:
+            data = json.loads(cipher.decrypt(f.read()))
+        if data.get("scopes") != GOOGLE_SCOPES:
+            return
+        expiry = datetime.fromisoformat(data["expiry"])
+        if (expiry - datetime.utcnow()).total_seconds() > TOKEN_REFRESH_MARGIN_SEC:
+            creds.token, creds.expiry = data["token"], expiry
+            print(f"[INFO] 캐시된 Google 토큰 사용 (만료: {expiry} UTC)")
+    except Exception as e:
+        print(f"[WARN] 토큰 캐시 읽기 실패: {e}")
+
+def _save_cached_token(creds):
+    cipher, path = _token_cipher(), _token_cache_path()
+    if cipher is None or not creds.token or not creds.expiry:
+        return
+    payload = json.dumps({
+        "token": creds.token,
+        "expiry": creds.expiry.isoformat(),
+        "scopes": GOOGLE_SCOPES,
+    }).encode()
+    try:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(cipher.encrypt(payload))
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[WARN] 토큰 캐시 저장 실패: {e}")
+
+class _SharedRefreshCredentials(Credentials):
+    """
+    서비스 계정 Credentials: 어느 경로(백그라운드·httplib2·requests)에서 갱신하든 _TOKEN_REFRESH_LOCK 으로 직렬화하고,
+    잠금을 기다리는 동안 다른 경로가 이미 새 토큰을 받았으면 다시 교환하지 않음. 갱신할 때마다 디스크 캐시에 저장.
+    """
+
+    def refresh(self, request):
+        stale_token = self.token
+        with _TOKEN_REFRESH_LOCK:
+            if self.token != stale_token and self.valid:
+                return
+            super().refresh(request)
+        _save_cached_token(self)
+
+def get_google_credentials():
+    """Sheets·Drive 공용 Credentials 를 1회만 생성 (디스크 토큰 캐시 + 백그라운드 갱신)"""
+    global _CREDENTIALS
+    with _CREDENTIALS_LOCK:
+        if _CREDENTIALS is None:
+            info = get_credentials_dict()
+            info["private_key"] = info["private_key"].replace("\\n", "\n")
+            creds = _SharedRefreshCredentials.from_service_account_info(info, scopes=GOOGLE_SCOPES)
+            _load_cached_token(creds)
+            # 만료 TOKEN_REFRESH_MARGIN_SEC 전마다 갱신해 API 호출이 토큰 교환을 기다리지 않게 함
+            google_auth_httplib2.BackgroundRefresher(
+                creds,
+                google.auth.transport.requests.Request(),
+                margin=TOKEN_REFRESH_MARGIN_SEC,
+                lock=_TOKEN_REFRESH_LOCK,
+            ).start()
+            _CREDENTIALS = creds
+    return _CREDENTIALS
 
 _GSP_CLIENT = None 
 
@@ -63,26 +175,93 @@ def get_gspread_client():
     """gspread.Client를 1회만 초기화해 재사용"""
     global _GSP_CLIENT
     if _GSP_CLIENT is None:               # 아직 없으면 → 생성
-        GOOGLE_CREDENTIALS_DICT["private_key"] = GOOGLE_CREDENTIALS_DICT["private_key"].replace("\\n", "\n")
-        creds = Credentials.from_service_account_info(
-            GOOGLE_CREDENTIALS_DICT,
-            scopes=["https://www.googleapis.com/auth/spreadsheets"]
-        )
-        _GSP_CLIENT = gspread.authorize(creds)
+        # CSV export 와 같은 세션 → 커넥션 재사용 + gzip 응답
+        _GSP_CLIENT = gspread.Client(auth=get_google_credentials(), session=get_authorized_session())
     return _GSP_CLIENT
 
+DRIVE_HTTP_POOL_SIZE = 8   # 동시에 쓸 수 있는 httplib2.Http 수
+
+# Sheets·Drive 가 같은 프로젝트 쿼터를 쓰므로 limiter 하나를 공유 (429/503 시 속도 절반, 성공 시 서서히 증가)
+GOOGLE_RATE_LIMITER = google_auth_httplib2.AdaptiveRateLimiter(rate=5.0, burst=10, max_rate=20.0)
+
+class _RateLimitedAdapter(requests.adapters.HTTPAdapter):
+    """
+    requests 세션용: 전송 전 limiter 토큰 획득, 응답 코드로 속도 조절, 429/503 은 백오프 후 재시도.
+    요청마다 API 지표(google_auth_httplib2.metrics)에 기록 → Sheets·CSV export·ZIP 업로드도 실행 후 요약에 포함.
+    429 는 실행 전 거절이라 모든 요청을 재시도, 503 은 다시 보내도 결과가 같은 요청만 (POST·PATCH·resumable 청크 PUT 은 그대로 반환).
+    """
+    def __init__(self, limiter, **kwargs):
+        self._limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        attempt = 0
+        while True:
+            self._limiter.acquire()
+            resp = self._send_recorded(request, **kwargs)
+            self._limiter.feedback(resp.status_code)
+            if (resp.status_code not in self._limiter.THROTTLE_STATUS_CODES
+                    or attempt >= self._limiter.max_retries
+                    or not google_auth_httplib2.is_retry_safe(resp.status_code, request.method, request.headers)
+                    or not isinstance(request.body, (bytes, str, type(None)))):
+                return resp
+            delay = self._limiter.retry_delay(attempt)
+            print(f"[WARN] Google API {resp.status_code} → {delay:.1f}초 후 재시도 ({attempt + 1}/{self._limiter.max_retries})")
+            resp.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _send_recorded(self, request, **kwargs):
+        """한 번의 왕복을 httplib2 경로와 같은 API 지표(google_auth_httplib2.metrics)에 기록 (예외도 error 로 기록)"""
+        endpoint = google_auth_httplib2._endpoint_key(request.method, request.url)
+        status, received = google_auth_httplib2.ERROR_STATUS, 0
+        started = time.perf_counter()
+        try:
+            resp = super().send(request, **kwargs)
+            status = resp.status_code
+            if kwargs.get("stream"):   # CSV 스트리밍 등: 본문을 미리 읽지 않음
+                received = int(resp.headers.get("Content-Length") or 0)
+            else:
+                received = len(resp.content)
+            return resp
+        finally:
+            google_auth_httplib2.metrics.record(
+                endpoint, status, time.perf_counter() - started,
+                google_auth_httplib2._body_size(request.body), received
+            )
+
 _DRIVE_SERVICE = None
 
 def get_drive_service():
+    """Drive 서비스 1회 생성 (스레드 간 공유 가능한 pooled AuthorizedHttp 사용)"""
     global _DRIVE_SERVICE
     if _DRIVE_SERVICE is None:
-        GOOGLE_CREDENTIALS_DICT["private_key"] = GOOGLE_CREDENTIALS_DICT["private_key"].replace("\\n", "\n")
-        creds = Credentials.from_service_account_info(
-            GOOGLE_CREDENTIALS_DICT,
-            scopes=["https://www.googleapis.com/auth/drive"]
+        http = google_auth_httplib2.PooledAuthorizedHttp(
+            get_google_credentials(),
+            http_factory=build_http,   # resumable 업로드용 308 처리가 설정된 Http
+            max_size=DRIVE_HTTP_POOL_SIZE,
+            rate_limiter=GOOGLE_RATE_LIMITER,
+            refresh_lock=_TOKEN_REFRESH_LOCK   # 백그라운드 갱신과 같은 잠금
         )
-        _DRIVE_SERVICE = build("drive", "v3", credentials=creds)
+        _DRIVE_SERVICE = build("drive", "v3", http=http)
     return _DRIVE_SERVICE
+
+_AUTHED_SESSION = None
+
+def get_authorized_session():
+    """gspread·CSV export·Drive 스트리밍 업로드 공용 인증 requests 세션 (1회만 생성)"""
+    global _AUTHED_SESSION
+    if _AUTHED_SESSION is None:
+        session = google.auth.transport.requests.AuthorizedSession(get_google_credentials())
+        # Google API 는 User-Agent 에 gzip 이 있어야 압축 응답을 보냄 (get_all_values 등 큰 JSON)
+        session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": f"{session.headers.get('User-Agent', 'python-requests')} (gzip)",
+        })
+        adapter = _RateLimitedAdapter(GOOGLE_RATE_LIMITER)
+        session.mount("https://", adapter)
+        _AUTHED_SESSION = session
+    return _AUTHED_SESSION
 # ─── 상수 ─────────────────────────────────────────────────────
 CONFIG_FILE   = "config.json"
 
@@ -92,6 +271,7 @@ else:
     BASE_DIR = os.path.dirname(__file__)
 
 PRODUCT_XLSX = os.path.join(BASE_DIR, "상품정보.xlsx")
+BROWSER_PROFILE_DIR = os.path.join(BASE_DIR, "chrome_profile")   # reuse_browser_profile 옵션용 Chrome 프로필
 
 PRODUCT_HEADERS = [
     "상품바코드", "상품바코드명", "상품코드",
@@ -119,27 +299,830 @@ def create_drive_folder(folder_name, parent_id=None):
     # 고정된 공유 폴더 ID 반환
     return "0AIUiN0FF2S3SUk9PVA"
 
-def upload_folder_to_drive(folder_path, drive_folder_id):
-    service = get_drive_service()   # 재사용!
+DRIVE_UPLOAD_WORKERS = 4   # 동시 업로드 수
+
+UPLOAD_SIMPLE_MAX_BYTES = 5 * 1024 * 1024   # 이하 파일은 multipart 단일 요청
+UPLOAD_CHUNK_BYTES      = 8 * 1024 * 1024   # resumable chunk 크기 (256KB 배수)
+
+_UPLOAD_STATS = {"multipart": 0, "resumable": 0, "requests": 0, "skipped": 0}
+_UPLOAD_STATS_LOCK = threading.Lock()
+
+def _count_upload(kind, requests_made):
+    with _UPLOAD_STATS_LOCK:
+        _UPLOAD_STATS[kind] += 1
+        _UPLOAD_STATS["requests"] += requests_made
+
+def _file_md5(file_path, block_size=1024 * 1024):
+    md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            md5.update(block)
+    return md5.hexdigest()
+
+def list_drive_folder(service, drive_folder_id):
+    """공유 드라이브 폴더의 파일 목록을 한 번에 조회 → {파일명: (id, md5Checksum)}"""
+    remote, page_token = {}, None
+    while True:
+        resp = service.files().list(
+            q=f"'{drive_folder_id}' in parents and trashed = false",
+            fields="nextPageToken, files(id, name, md5Checksum)",
+            pageSize=1000,
+            pageToken=page_token,
+            corpora="allDrives",
+            includeItemsFromAllDrives=True,
+            supportsAllDrives=True,
+        ).execute()
+        with _UPLOAD_STATS_LOCK:
+            _UPLOAD_STATS["requests"] += 1
+        for f in resp.get("files", []):
+            remote.setdefault(f["name"], (f["id"], f.get("md5Checksum")))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return remote
+
+def _media_request(service, file_path, drive_folder_id, file_id, media):
+    """file_id 가 있으면 기존 파일 내용 갱신, 없으면 새 파일 생성"""
+    if file_id:
+        return service.files().update(
+            fileId=file_id,
+            media_body=media,
+            fields="id",
+            supportsAllDrives=True
+        )
+    file_metadata = {
+        "name": os.path.basename(file_path),
+        "parents": [drive_folder_id],
+    }
+    return service.files().create(
+        body=file_metadata,
+        media_body=media,
+        fields="id",
+        supportsAllDrives=True  # ✅ 이거 추가
+    )
+
+def _execute_with_backoff(request):
+    """
+    단일 요청(multipart 업로드 등) execute(): 전송 계층 재시도가 끝난 뒤에도 429 면 백오프 후 다시 실행.
+    503 은 다시 보내도 안전한 요청만 (files.create·update 는 이미 처리됐을 수 있어 그대로 실패).
+    """
+    for attempt in range(GOOGLE_RATE_LIMITER.max_retries + 1):
+        try:
+            return request.execute()
+        except HttpError as e:
+            status = e.resp.status
+            if (attempt >= GOOGLE_RATE_LIMITER.max_retries
+                    or status not in GOOGLE_RATE_LIMITER.THROTTLE_STATUS_CODES
+                    or not google_auth_httplib2.is_retry_safe(status, request.method)):
+                raise
+            delay = GOOGLE_RATE_LIMITER.retry_delay(attempt)
+            print(f"[WARN] Drive {status} → {delay:.1f}초 후 재시도 ({attempt + 1}/{GOOGLE_RATE_LIMITER.max_retries})")
+            time.sleep(delay)
+
+def _upload_file(service, file_path, drive_folder_id, file_id=None):
+    # 작은 라벨 PDF 는 세션 생성 왕복이 없는 multipart 한 번으로 끝냄
+    if os.path.getsize(file_path) <= UPLOAD_SIMPLE_MAX_BYTES:
+        media = MediaFileUpload(file_path, resumable=False)
+        uploaded = _execute_with_backoff(_media_request(service, file_path, drive_folder_id, file_id, media))
+        _count_upload("multipart", 1)
+        return uploaded["id"]
+
+    media = MediaFileUpload(file_path, chunksize=UPLOAD_CHUNK_BYTES, resumable=True)
+    request = _media_request(service, file_path, drive_folder_id, file_id, media)
+    uploaded, requests_made, throttled = None, 1, 0   # 1 = 세션 생성 요청
+    while uploaded is None:
+        try:
+            _, uploaded = request.next_chunk()
+        except HttpError as e:
+            # 청크 429/503 은 전송 계층이 재시도하지 않음 → 백오프 후 next_chunk 가 저장 위치를 먼저 조회하고 이어서 보냄
+            if (e.resp.status not in GOOGLE_RATE_LIMITER.THROTTLE_STATUS_CODES
+                    or throttled >= GOOGLE_RATE_LIMITER.max_retries):
+                raise
+            time.sleep(GOOGLE_RATE_LIMITER.retry_delay(throttled))
+            throttled += 1
+            requests_made += 1   # 상태 조회 요청
+        requests_made += 1
+    _count_upload("resumable", requests_made)
+    return uploaded["id"]
+
+class DriveUploadPipeline:
+    """
+    파일이 준비되는 대로 Drive 에 올리는 producer/consumer 큐.
+    submit() 으로 파일 경로를 넣으면 workers 개 스레드가 바로 업로드하고,
+    close() 에서 남은 업로드를 기다린 뒤 통계를 반환한다 (실패가 있으면 RuntimeError).
+    skip_unchanged=True 면 Drive 폴더를 한 번 조회해 md5Checksum 이 같은 파일은 건너뛰고,
+    같은 이름의 바뀐 파일은 새로 만들지 않고 내용만 갱신한다.
+    같은 파일명이 한 실행 안에서 여러 번 들어오면 이름별 lock 으로 차례로 처리하고,
+    앞선 업로드 결과(id, md5)를 remote 에 반영해 두 번째는 갱신/건너뜀이 되도록 한다 (Drive 중복 생성 방지).
+    """
+
+    def __init__(self, drive_folder_id, workers=DRIVE_UPLOAD_WORKERS, progress_cb=None,
+                 skip_unchanged=False, expected_total=0):
+        self.service = get_drive_service()   # 재사용! (pooled http 라 워커 간 공유 가능)
+        self.drive_folder_id = drive_folder_id
+        self.progress_cb = progress_cb
+        self.skip_unchanged = skip_unchanged
+        self.expected_total = expected_total
+        self.submitted = self.done = 0
+        self.failures = []
+        self._lock = threading.Lock()
+        self._name_locks = {}
+        self._queue = queue.Queue()
+
+        with _UPLOAD_STATS_LOCK:
+            _UPLOAD_STATS.update(multipart=0, resumable=0, requests=0, skipped=0)
+        self.remote = list_drive_folder(self.service, drive_folder_id) if skip_unchanged else {}
+
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, file_path):
+        with self._lock:
+            self.submitted += 1
+        self._queue.put(file_path)
+
+    def _worker(self):
+        while True:
+            file_path = self._queue.get()
+            if file_path is None:
+                return
+            filename = os.path.basename(file_path)
+            with self._lock:
+                name_lock = self._name_locks.setdefault(filename, threading.Lock())
+            try:
+                with name_lock:   # 같은 이름은 한 번에 하나만 → 먼저 만든 파일을 다음 업로드가 갱신
+                    with self._lock:
+                        file_id, md5 = self.remote.get(filename, (None, None))
+                    local_md5 = _file_md5(file_path)
+                    if self.skip_unchanged and md5 and md5 == local_md5:
+                        _count_upload("skipped", 0)
+                        result = "변경 없음, 건너뜀"
+                    else:
+                        new_id = _upload_file(self.service, file_path, self.drive_folder_id, file_id)
+                        with self._lock:
+                            self.remote[filename] = (new_id, local_md5)
+                        result = f"Drive File ID: {new_id}"
+                failed = False
+            except Exception as e:
+                result, failed = str(e), True
+
+            with self._lock:
+                self.done += 1
+                done, total = self.done, max(self.submitted, self.expected_total)
+                if failed:
+                    self.failures.append(filename)
+            mark = "✖ 업로드 실패" if failed else "✔ 업로드 완료"
+            print(f"{mark} ({done}/{total}): {filename} → {result}")
+            if self.progress_cb:
+                self.progress_cb(done, total, filename)
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+
+        stats = dict(_UPLOAD_STATS)
+        print(f"[INFO] Drive 업로드 요청 수: {stats['requests']} "
+              f"(multipart {stats['multipart']}건, resumable {stats['resumable']}건, 건너뜀 {stats['skipped']}건)")
+
+        if self.failures:
+            raise RuntimeError(f"{len(self.failures)}개 파일 업로드 실패: {', '.join(self.failures)}")
+        return stats
+
+def upload_folder_to_drive(folder_path, drive_folder_id,
+                           workers=DRIVE_UPLOAD_WORKERS, progress_cb=None,
+                           skip_unchanged=False):
+    """
+    folder_path 의 파일을 workers 개 스레드로 동시 업로드 (DriveUploadPipeline 사용).
+    progress_cb(완료 수, 전체 수, 파일명) 으로 파일별 진행 상황을 알림.
+    반환값: 업로드 방식별 건수와 전체 HTTP 요청 수
+    """
+    file_paths = [
+        os.path.join(folder_path, filename)
+        for filename in sorted(os.listdir(folder_path))
+        if os.path.isfile(os.path.join(folder_path, filename))
+    ]
+    pipeline = DriveUploadPipeline(
+        drive_folder_id, workers=workers, progress_cb=progress_cb,
+        skip_unchanged=skip_unchanged, expected_total=len(file_paths)
+    )
+    for path in file_paths:
+        pipeline.submit(path)
+    return pipeline.close()
+
+DRIVE_RESUMABLE_URL = "https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable&supportsAllDrives=true"
+RESUMABLE_MAX_STALLS = 3   # 서버 저장 위치가 연속으로 그대로면 중단
+
+class _DriveResumableWriter:
+    """
+    쓰기 전용 파일 객체 → Drive resumable 업로드 세션.
+    chunk_size 만큼 모일 때마다 전체 크기를 모르는 상태("bytes a-b/*")로 전송하고,
+    finish() 에서 마지막 조각과 전체 크기를 보낸다. seek/tell 이 없으므로 zipfile 은 스트리밍 모드로 기록한다.
+    """
 
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        if not os.path.isfile(file_path):
+    def __init__(self, session, upload_url, chunk_size=UPLOAD_CHUNK_BYTES):
+        self.session = session
+        self.upload_url = upload_url
+        self.chunk_size = chunk_size
+        self.offset = 0          # 서버가 저장했다고 확인한 바이트 수
+        self.requests_made = 0
+        self._stalls = 0
+        self._throttled = 0      # 429/503 백오프 횟수
+        self._buf = bytearray()  # 아직 서버에 저장이 확인되지 않은 데이터
+
+    def write(self, data):
+        self._buf += data
+        while len(self._buf) >= self.chunk_size:
+            self._put(final=False)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _put(self, final):
+        """
+        버퍼 앞부분(중간 조각은 chunk_size, 마지막은 전부)을 전송.
+        308 응답이면 서버가 Range 헤더로 알려준 저장 위치까지만 버퍼에서 지우고,
+        덜 저장된 나머지는 버퍼에 남겨 다음 요청에서 다시 보낸다. 업로드가 끝나면 파일 정보를 반환.
+        """
+        chunk = bytes(self._buf) if final else bytes(self._buf[:self.chunk_size])
+        total = str(self.offset + len(chunk)) if final else "*"
+        if chunk:
+            content_range = f"bytes {self.offset}-{self.offset + len(chunk) - 1}/{total}"
+        else:
+            content_range = f"bytes */{total}"
+        r = self.session.put(self.upload_url, data=chunk, headers={"Content-Range": content_range}, timeout=300)
+        self.requests_made += 1
+
+        throttled = False
+        while (r.status_code in GOOGLE_RATE_LIMITER.THROTTLE_STATUS_CODES
+               and self._throttled < GOOGLE_RATE_LIMITER.max_retries):
+            # 청크는 그대로 다시 보내지 않음: 백오프 후 서버가 저장한 위치를 조회하고 거기서부터 이어 보냄
+            delay = GOOGLE_RATE_LIMITER.retry_delay(self._throttled)
+            print(f"[WARN] resumable 업로드 {r.status_code} → {delay:.1f}초 후 저장 위치 확인")
+            time.sleep(delay)
+            self._throttled += 1
+            throttled = True
+            r = self.session.put(self.upload_url, data=b"", headers={"Content-Range": "bytes */*"}, timeout=60)
+            self.requests_made += 1
+
+        if final and r.status_code in (200, 201):
+            self.offset += len(self._buf)
+            self._buf.clear()
+            return r.json()
+        if r.status_code != 308:
+            raise RuntimeError(f"resumable 업로드 실패 (HTTP {r.status_code}): {r.text[:200]}")
+
+        m = re.match(r"bytes=0-(\d+)", r.headers.get("Range", ""))
+        committed = min(int(m.group(1)) + 1 if m else 0, self.offset + len(chunk))
+        if committed > self.offset:
+            self._stalls = self._throttled = 0
+        elif not throttled:   # 저장 위치 조회만 한 경우는 멈춤으로 세지 않음
+            self._stalls += 1
+            if self._stalls >= RESUMABLE_MAX_STALLS:
+                raise RuntimeError(f"resumable 업로드가 {self.offset} bytes 에서 진행되지 않음")
+        del self._buf[:committed - self.offset]
+        self.offset = committed
+        return None
+
+    def finish(self):
+        while True:
+            uploaded = self._put(final=True)
+            if uploaded is not None:
+                return uploaded
+
+def stream_zip_to_drive(file_paths, archive_name, drive_folder_id):
+    """
+    file_paths 를 ZIP 으로 묶으면서 그대로 Drive resumable 업로드에 흘려보냄 (임시 ZIP 파일 없음).
+    반환값: 업로드된 Drive 파일 ID
+    """
+    session = get_authorized_session()
+    # 세션 생성은 파일을 만들지 않으므로(마지막 청크에서 생성) 429 뿐 아니라 503 도 다시 요청해도 안전
+    for attempt in range(GOOGLE_RATE_LIMITER.max_retries + 1):
+        r = session.post(
+            DRIVE_RESUMABLE_URL,
+            json={"name": archive_name, "parents": [drive_folder_id], "mimeType": "application/zip"},
+            headers={"X-Upload-Content-Type": "application/zip"},
+            timeout=60
+        )
+        if r.status_code not in GOOGLE_RATE_LIMITER.THROTTLE_STATUS_CODES or attempt >= GOOGLE_RATE_LIMITER.max_retries:
+            break
+        delay = GOOGLE_RATE_LIMITER.retry_delay(attempt)
+        print(f"[WARN] ZIP 업로드 세션 생성 {r.status_code} → {delay:.1f}초 후 재시도")
+        time.sleep(delay)
+    r.raise_for_status()
+
+    writer = _DriveResumableWriter(session, r.headers["Location"])
+    with zipfile.ZipFile(writer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for path in file_paths:
+            zf.write(path, arcname=os.path.basename(path))
+    uploaded = writer.finish()
+
+    print(f"✔ ZIP 업로드 완료: {archive_name} ({len(file_paths)}개 파일, {writer.offset} bytes, "
+          f"요청 {writer.requests_made + 1}회) → Drive File ID: {uploaded['id']}")
+    return uploaded["id"]
+
+SHIPMENT_DOC_PREFIXES = ("shipment_label_document", "shipment_manifest_document")
+
+def move_shipment_downloads(download_dir, target_dir):
+    """실행 전용 다운로드 폴더에서 받기가 끝난 라벨/매니페스트를 target_dir 로 옮기고 옮긴 경로 목록 반환"""
+    moved = []
+    for fname in os.listdir(download_dir):
+        low = fname.lower()
+        if not low.startswith(SHIPMENT_DOC_PREFIXES) or low.endswith(".crdownload"):
             continue
+        src = os.path.join(download_dir, fname)
+        dst = os.path.join(target_dir, fname)
+        try:
+            shutil.move(src, dst)
+        except OSError as e:   # 아직 브라우저가 잡고 있는 파일 → 다음 확인 때 다시 시도
+            print(f"[경고] {fname} 이동 실패: {e}")
+            continue
+        moved.append(dst)
+    return moved
 
-        file_metadata = {
-            "name": filename,
-            "parents": [drive_folder_id],
-        }
+DOWNLOAD_FILE_TIMEOUT_SEC = 30   # 파일 하나가 도착하기까지(또는 진행이 멈춘 채로) 기다릴 최대 시간
 
-        media = MediaFileUpload(file_path, resumable=True)
-        uploaded = service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields="id",
-            supportsAllDrives=True  # ✅ 이거 추가
-        ).execute()
-        print(f"✔ 업로드 완료: {filename} → Drive File ID: {uploaded['id']}")
+class DownloadWatcher:
+    """
+    download_dir 을 interval 초마다 확인해 완료된 라벨/매니페스트를 target_dir 로 옮기는 스레드.
+    expect(n) 으로 기다릴 파일 수를 늘리고 wait() 로 실제 도착까지 대기한다 (고정 sleep 대신).
+    Chrome 은 받는 동안 .crdownload 로 쓰다가 끝나면 이름을 바꾸므로, .crdownload 가 커지는 동안은
+    시간 초과로 보지 않고 파일이 도착하거나 진행이 멈춘 뒤 per_file_timeout 초가 지나야 포기한다.
+    """
+
+    def __init__(self, download_dir, target_dir, on_moved=None, interval=0.2):
+        self.download_dir = download_dir
+        self.target_dir = target_dir
+        self.on_moved = on_moved
+        self.interval = interval
+        self.expected = self.arrived = 0
+        self._progress = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def expect(self, count=1):
+        with self._cond:
+            self.expected += count
+
+    def _partial_state(self):
+        """진행 중인 .crdownload 파일들의 (이름, 크기) — 바뀌면 다운로드가 진행 중"""
+        state = []
+        for fname in os.listdir(self.download_dir):
+            if fname.lower().endswith(".crdownload"):
+                with contextlib.suppress(OSError):
+                    state.append((fname, os.path.getsize(os.path.join(self.download_dir, fname))))
+        return sorted(state)
+
+    def _run(self):
+        while True:
+            stopping = self._stop.is_set()
+            moved = move_shipment_downloads(self.download_dir, self.target_dir)
+            progress = self._partial_state()
+            with self._cond:
+                self.arrived += len(moved)
+                if moved or progress != self._progress:
+                    self._progress = progress
+                    self._cond.notify_all()
+            for path in moved:
+                if self.on_moved:
+                    self.on_moved(path)
+            if stopping:
+                return
+            self._stop.wait(self.interval)
+
+    def wait(self, per_file_timeout=DOWNLOAD_FILE_TIMEOUT_SEC) -> bool:
+        """기대한 파일이 모두 도착하면 True, 진행 없이 per_file_timeout 초가 지나면 False"""
+        with self._cond:
+            deadline = time.monotonic() + per_file_timeout
+            seen = (self.arrived, self._progress)
+            while self.arrived < self.expected:
+                if (self.arrived, self._progress) != seen:   # 도착 또는 진행 → 기한 연장
+                    seen = (self.arrived, self._progress)
+                    deadline = time.monotonic() + per_file_timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"[경고] 다운로드 대기 시간 초과: {self.expected - self.arrived}개 파일 미도착")
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self):
+        """마지막으로 한 번 더 수거한 뒤 종료"""
+        self._stop.set()
+        self._thread.join()
+
+PORTAL_BASE_URL = "https://supplier.coupang.com"
+SHIPMENT_PDF_ENDPOINTS = (   # (파일명 접두어, 생성 URL 경로) — SHIPMENT_DOC_PREFIXES 와 같은 순서
+    ("shipment_label_document", "/ibs/shipment/parcel/pdf-label/generate"),
+    ("shipment_manifest_document", "/ibs/shipment/parcel/pdf-manifest/generate"),
+)
+PDF_FETCH_WORKERS = 4   # 동시 PDF 다운로드 수
+PDF_FETCH_RETRIES = 2   # 문서 하나당 재시도 횟수 (그래도 실패하면 브라우저 탭으로 대체)
+_CD_FILENAME = re.compile(r"filename\*?=(?:UTF-8'')?\"?([^\";]+)", re.I)
+
+def session_from_driver(driver, pool_size=PDF_FETCH_WORKERS) -> requests.Session:
+    """로그인된 Selenium 브라우저의 쿠키·User-Agent 를 복사한 requests 세션 (커넥션 풀 pool_size)"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent;")
+    for c in driver.get_cookies():
+        session.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+    return session
+
+class ShipmentPdfFetcher:
+    """
+    브라우저 탭을 열지 않고 라벨/매니페스트 PDF 를 HTTP 로 직접 병렬 다운로드.
+    submit(shipment_no) 하면 두 문서를 workers 개 스레드가 받아 target_dir 에 바로 저장하고
+    (저장될 때마다 on_saved(path) 호출 + 체크포인트 기록), close() 는 다운로드에 실패한 (쉽먼트번호, 문서 접두어) 목록을 반환한다.
+    """
+
+    def __init__(self, driver, target_dir, workers=PDF_FETCH_WORKERS, on_saved=None,
+                 base_url=PORTAL_BASE_URL, timeout=60, retries=PDF_FETCH_RETRIES):
+        self.session = session_from_driver(driver, workers)
+        self.target_dir = target_dir
+        self.on_saved = on_saved
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.failures = []
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pdf_fetch")
+        self._futures = []
+
+    def submit(self, shipment_no, skip=()):
+        """skip: 체크포인트상 이미 받은 문서 접두어 (재실행 시 건너뜀)"""
+        for prefix, path in SHIPMENT_PDF_ENDPOINTS:
+            if prefix not in skip:
+                self._futures.append(self._pool.submit(self._fetch, shipment_no, prefix, path))
+
+    def _download(self, shipment_no, prefix, path):
+        resp = self.session.get(f"{self.base_url}{path}",
+                                params={"parcelShipmentSeq": shipment_no}, timeout=self.timeout)
+        resp.raise_for_status()
+        if not resp.content.startswith(b"%PDF"):   # 세션 만료 시 로그인 HTML 이 옴
+            raise ValueError(f"PDF 가 아닌 응답 ({resp.headers.get('Content-Type', '?')})")
+
+        m = _CD_FILENAME.search(resp.headers.get("Content-Disposition", ""))
+        fname = os.path.basename(requests.utils.unquote(m.group(1))) if m else ""
+        if not fname.lower().startswith(prefix):
+            fname = f"{prefix}_{shipment_no}.pdf"
+
+        dst = os.path.join(self.target_dir, fname)
+        tmp = dst + ".part"
+        with open(tmp, "wb") as f:
+            f.write(resp.content)
+        os.replace(tmp, dst)
+        return dst
+
+    def _fetch(self, shipment_no, prefix, path):
+        for attempt in range(self.retries + 1):
+            try:
+                dst = self._download(shipment_no, prefix, path)
+                break
+            except Exception as e:
+                print(f"[경고] {shipment_no} {prefix} 직접 다운로드 실패 ({attempt + 1}/{self.retries + 1}): {e}")
+                if attempt < self.retries:
+                    time.sleep(2 ** attempt)
+        else:
+            with self._lock:
+                self.failures.append((shipment_no, prefix))
+            return None
+
+        fname = os.path.basename(dst)
+        shipment_cache.mark_doc(shipment_no, prefix, fname)
+        print(f"✔ PDF 다운로드 완료: {fname}")
+        if self.on_saved:
+            self.on_saved(dst)
+        return dst
+
+    def close(self):
+        for fut in self._futures:
+            fut.result()
+        self._pool.shutdown()
+        self.session.close()
+        return list(self.failures)
+
+WAIT_TIMEOUTS = {   # 대기 이름 → (최대 대기 초, 폴링 간격 초)
+    "login_form":     (15, 0.25),
+    "session_check":  (10, 0.25),
+    "menu":           (15, 0.25),
+    "search_input":   (15, 0.25),
+    "shipment_table": (15, 0.25),
+    "page_change":    (10, 0.1),
+    "search_result":  (10, 0.1),
+}
+
+class WaitPolicy:
+    """
+    전역 implicitly_wait 대신 쓰는 명시적 대기. 대기마다 이름별 timeout·폴링 간격을 적용하고
+    실제로 걸린 시간을 이름별로 기록한다 (format() 으로 크롤 후 요약 출력).
+    """
+
+    def __init__(self, timeouts=WAIT_TIMEOUTS):
+        self.timeouts = timeouts
+        self._durations = {}
+        self._lock = threading.Lock()
+
+    def until(self, driver, name, condition):
+        """condition(driver) 가 참이 될 때까지 대기 후 그 값을 반환 (시간 초과 시 TimeoutException)"""
+        timeout, poll = self.timeouts[name]
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = WebDriverWait(
+                driver, timeout, poll_frequency=poll,
+                ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)
+            ).until(condition)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._durations.setdefault(name, []).append((time.perf_counter() - started, ok))
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+
+    def format(self) -> str:
+        with self._lock:
+            items = sorted(self._durations.items())
+        lines = []
+        for name, records in items:
+            d = sorted(t for t, _ in records)
+            timeouts = sum(1 for _, ok in records if not ok)
+            lines.append(f"  {name:<15} {len(d):>4}회  평균 {sum(d) / len(d):.2f}초  "
+                         f"최대 {d[-1]:.2f}초  시간초과 {timeouts}회")
+        return "\n".join(lines)
+
+waits = WaitPolicy()
+
+SHIPMENT_ROWS_JS = """
+const table = document.querySelector("table#parcel-tab");
+if (!table) return {header: [], rows: []};
+return {
+    header: Array.from(table.querySelectorAll("thead th")).map(th => th.innerText.trim()),
+    rows: Array.from(table.querySelectorAll("tbody tr")).map(
+        tr => Array.from(tr.querySelectorAll("td")).map(td => td.innerText.trim())),
+};
+"""
+_PO_HEADER = re.compile(r"발주\s*번호|\bPO\b", re.I)
+SHIPMENT_NEXT_PAGE_CSS = (".pagination li:not(.disabled) a[aria-label='Next'], "
+                          ".pagination li.next:not(.disabled) a")
+SHIPMENT_LIST_MAX_PAGES = 50
+
+def _po_column(header):
+    """목록 헤더에서 발주번호 칸 위치 (없으면 None)"""
+    for i, text in enumerate(header):
+        if i and _PO_HEADER.search(text):   # 0 번은 쉽먼트번호
+            return i
+    return None
+
+def resolve_shipments_bulk(driver, po_numbers, max_pages=SHIPMENT_LIST_MAX_PAGES) -> dict[str, str]:
+    """
+    Shipments 목록 페이지를 한 번 훑어 {발주번호: 쉽먼트번호} 매핑 생성 (발주번호마다 검색하지 않음).
+    각 페이지의 헤더·행을 스크립트 한 번으로 읽고, 헤더로 찾은 발주번호 칸에 찾는 발주번호가 있으면
+    첫 칸(쉽먼트번호)과 매핑 (다른 칸의 수량·날짜 등 숫자는 보지 않음). 발주번호 칸이 없으면 첫 페이지에서 중단.
+    모두 찾으면 바로 멈추고, 못 찾은 발주번호는 결과에 없음 (호출 측에서 개별 검색으로 보완).
+    """
+    wanted = {str(po).strip() for po in po_numbers}
+    found = {}
+    try:
+        waits.until(driver, "shipment_table",
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "table#parcel-tab tbody")))
+        for _ in range(max_pages):
+            table = driver.execute_script(SHIPMENT_ROWS_JS) or {}
+            col = _po_column(table.get("header", []))
+            if col is None:
+                print(f"[경고] 쉽먼트 목록에 발주번호 칸이 없음 (헤더: {table.get('header')}) → 개별 검색으로 진행")
+                break
+            for cells in table.get("rows", []):
+                if len(cells) <= col or not cells[0]:
+                    continue
+                for po in set(re.findall(r"\d+", cells[col])) & wanted:   # 한 쉽먼트에 발주 여러 건
+                    found.setdefault(po, cells[0])
+            if wanted <= found.keys():
+                break
+
+            next_btns = driver.find_elements(By.CSS_SELECTOR, SHIPMENT_NEXT_PAGE_CSS)
+            if not next_btns:
+                break
+            first_row = driver.find_elements(By.CSS_SELECTOR, "table#parcel-tab tbody tr")
+            next_btns[0].click()
+            if first_row:
+                waits.until(driver, "page_change", EC.staleness_of(first_row[0]))
+    except Exception as e:
+        print(f"[경고] 쉽먼트 목록 일괄 조회 실패 → 개별 검색으로 진행: {e}")
+
+    print(f"[INFO] 쉽먼트 일괄 조회: {len(found)}/{len(wanted)}건 매칭")
+    return found
+
+SEARCH_NO_RESULT_GRACE_SEC = 2.0   # '결과 없음' 행이 그대로 남아 있을 때 새 결과로 볼 때까지의 시간
+
+def _search_result(po_no, old_row, old_text, grace=SEARCH_NO_RESULT_GRACE_SEC):
+    """
+    검색 결과 대기 조건: 첫 행이 검색한 발주번호를 포함하거나(같은 행이 그대로 갱신되거나
+    연속한 발주가 같은 쉽먼트여도 바로 끝남), 이전 결과 행과 다른 행·다른 내용이면 [쉽먼트번호].
+    '조회 결과 없음' 행(칸 하나짜리/colspan)이 새로 나타나면 [""], 이전 검색도 결과가 없어
+    같은 행이 그대로면 grace 초 뒤에 [""] 를 반환 (10초를 기다리지 않음).
+    """
+    started = time.monotonic()
+
+    def condition(driver):
+        rows = driver.find_elements(By.CSS_SELECTOR, "table#parcel-tab tbody tr")
+        if not rows:
+            return False
+        row = rows[0]
+        changed = row != old_row or row.text != old_text
+        cells = row.find_elements(By.TAG_NAME, "td")
+        if len(cells) <= 1 or cells[0].get_attribute("colspan"):
+            if changed or time.monotonic() - started >= grace:
+                return [""]
+            return False
+        if changed or any(po_no in re.findall(r"\d+", c.text) for c in cells[1:]):
+            return [cells[0].text.strip()]
+        return False
+    return condition
+
+def search_shipment(driver, search_input, po_no):
+    """
+    발주번호 하나를 검색해 첫 행의 쉽먼트번호 반환 ('조회 결과 없음' 이면 "").
+    결과가 나타나지 않으면 TimeoutException → 호출 측(ShipmentSearchPool)이 재시도·실패 처리.
+    """
+    old_rows = driver.find_elements(By.CSS_SELECTOR, "table#parcel-tab tbody tr")
+    old_row = old_rows[0] if old_rows else None
+    old_text = old_row.text if old_row else None
+    search_input.clear(); search_input.send_keys(po_no)
+    driver.find_element(By.CSS_SELECTOR, "button#shipment-search-btn").click()
+    try:
+        return waits.until(driver, "search_result", _search_result(str(po_no), old_row, old_text))[0]
+    except TimeoutException as e:   # WebDriverWait 의 메시지는 비어 있어 로그용으로 다시 던짐
+        raise TimeoutException(f"검색 결과가 {waits.timeouts['search_result'][0]}초 안에 나타나지 않음") from e
+
+def supplier_session_valid(driver) -> bool:
+    """대시보드를 열어 로그인 페이지로 튕기지 않으면 True (프로필에 유효한 세션이 남아 있음)"""
+    driver.get(f"{PORTAL_BASE_URL}/dashboard/KR")
+    try:
+        waits.until(driver, "session_check",
+                    lambda d: "xauth.coupang.com" in d.current_url
+                              or d.find_elements(By.CSS_SELECTOR, "a[href='/logistics']"))
+    except TimeoutException:
+        return False
+    return driver.current_url.startswith(PORTAL_BASE_URL)
+
+def open_shipment_search(driver):
+    """Shipments 화면으로 이동해 발주번호 입력창 반환"""
+    driver.get(f"{PORTAL_BASE_URL}/ibs/asn/active")
+    return waits.until(driver, "search_input",
+                       EC.presence_of_element_located((By.CSS_SELECTOR, "input#purchaseOrderSeq")))
+
+HEAVY_RESOURCE_PATTERNS = [   # 빠른 크롤 모드에서 CDP 로 차단할 리소스
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm",
+]
+
+def block_heavy_resources(driver):
+    """실행 중인 브라우저에서 이미지·폰트·동영상 요청 차단 (로그인 후 메인 브라우저용)"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": HEAVY_RESOURCE_PATTERNS})
+
+CRAWL_WORKERS = 3            # 발주번호 개별 검색에 쓸 최대 브라우저 수 (로그인된 메인 브라우저 포함)
+CRAWL_POS_PER_WORKER = 10    # 브라우저 하나를 더 띄울 만큼의 최소 발주번호 수
+CRAWL_PO_RETRIES = 2         # 발주번호 하나의 검색 오류 재시도 횟수 (넘으면 그 발주만 건너뛰고 계속)
+
+class ShipmentSearchPool:
+    """
+    발주번호 개별 검색을 브라우저 여러 개로 나눠 처리.
+    메인 브라우저의 쿠키(CDP Network.getAllCookies)를 새 브라우저에 심어 로그인 없이 같은 세션으로 검색하고
+    (WebDriver 는 스레드 안전하지 않으므로 쿠키는 보조 스레드를 띄우기 전에 한 번만 읽음),
+    모든 워커가 큐 하나에서 발주번호를 가져가므로 빨리 끝난 브라우저가 더 많이 맡는다.
+    보조 브라우저가 실패하면 그 발주번호를 큐에 되돌리고 해당 워커만 종료 (메인 브라우저는 끝까지 처리).
+    발주번호마다 검색 오류는 retries 번까지만 재시도하고, 그래도 안 되면 failed 에 넣고 다음 발주로 넘어간다.
+    """
+
+    def __init__(self, driver, search_input, make_driver, workers=CRAWL_WORKERS, on_done=None,
+                 retries=CRAWL_PO_RETRIES):
+        self.driver = driver
+        self.search_input = search_input
+        self.make_driver = make_driver
+        self.workers = max(1, workers)
+        self.on_done = on_done
+        self.retries = retries
+        self.results = {}
+        self.failed = []
+        self._attempts = {}
+        self.durations = []          # 검색 1건당 소요 시간 (페이지 전환 지연 측정용)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+
+    def _search(self, driver, search_input, po_no):
+        started = time.perf_counter()
+        shipment_no = search_shipment(driver, search_input, po_no)
+        with self._lock:
+            self.durations.append(time.perf_counter() - started)
+        return shipment_no
+
+    def _spawn_driver(self, cookies):
+        drv = self.make_driver()
+        try:
+            drv.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+            return drv, open_shipment_search(drv)
+        except Exception:
+            drv.quit()
+            raise
+
+    def _finish(self, po_no, shipment_no):
+        with self._lock:
+            self.results[po_no] = shipment_no
+            done = len(self.results)
+        if self.on_done:
+            self.on_done(done, po_no, shipment_no)
+
+    def _retry_or_give_up(self, po_no, error):
+        """검색 오류: 재시도 한도 안이면 큐에 되돌리고, 넘으면 빈 쉽먼트로 마무리"""
+        with self._lock:
+            attempts = self._attempts[po_no] = self._attempts.get(po_no, 0) + 1
+        if attempts <= self.retries:
+            print(f"[경고] {po_no} 검색 오류, 재시도 {attempts}/{self.retries}: {error}")
+            self._queue.put(po_no)
+            return
+        print(f"[경고] {po_no} 검색 {attempts}회 실패 → 건너뜀: {error}")
+        with self._lock:
+            self.failed.append(po_no)
+        self._finish(po_no, "")
+
+    def _main_worker(self):
+        while True:
+            try:
+                po_no = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                shipment_no = self._search(self.driver, self.search_input, po_no)
+            except Exception as e:
+                self._retry_or_give_up(po_no, e)
+                with contextlib.suppress(Exception):   # 화면이 깨졌을 수 있으므로 검색 화면 다시 열기
+                    self.search_input = open_shipment_search(self.driver)
+                continue
+            self._finish(po_no, shipment_no)
+
+    def _extra_worker(self, idx, cookies):
+        drv = None
+        try:
+            drv, search_input = self._spawn_driver(cookies)
+            print(f"[INFO] 검색 브라우저 {idx} 준비 완료")
+            errors = 0
+            while True:
+                try:
+                    po_no = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    shipment_no = self._search(drv, search_input, po_no)
+                except Exception as e:
+                    self._retry_or_give_up(po_no, e)   # 다른 브라우저가 이어서 처리
+                    errors += 1
+                    if errors >= 2:   # 연속 오류 → 이 브라우저 자체가 망가진 것으로 보고 종료
+                        raise
+                    search_input = open_shipment_search(drv)
+                    continue
+                errors = 0
+                self._finish(po_no, shipment_no)
+        except Exception as e:
+            print(f"[경고] 검색 브라우저 {idx} 중단: {e}")
+        finally:
+            if drv:
+                with contextlib.suppress(Exception):
+                    drv.quit()
+
+    def search_all(self, po_numbers) -> dict[str, str]:
+        for po_no in po_numbers:
+            self._queue.put(po_no)
+        extra = min(self.workers, -(-self._queue.qsize() // CRAWL_POS_PER_WORKER)) - 1
+        cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"] if extra > 0 else []
+        threads = [threading.Thread(target=self._extra_worker, args=(i + 1, cookies), daemon=True)
+                   for i in range(max(0, extra))]
+        for t in threads:
+            t.start()
+        self._main_worker()
+        for t in threads:
+            t.join()
+        self._main_worker()   # 보조 브라우저가 마지막에 되돌린 발주번호
+        if self.durations:
+            d = sorted(self.durations)
+            print(f"[INFO] 발주번호 검색 {len(d)}건 (브라우저 {1 + max(0, extra)}개): "
+                  f"평균 {sum(d) / len(d):.2f}초, 중앙값 {d[len(d) // 2]:.2f}초, 최대 {d[-1]:.2f}초")
+        return dict(self.results)
 
 def safe_strip(value):
     """None 또는 NaN을 안전하게 처리하여 문자열로 반환"""
@@ -190,52 +1173,133 @@ def load_purchase_price_map(list_path: str) -> dict[str, str]:
     return price_map
 
 
-def load_stock_df(biz_num: str, save_excel: bool = True) -> pd.DataFrame:
+STOCK_RESULT_COLUMNS = ["SKU", "상품명", "바코드", "수량"]
+CSV_CHUNK_ROWS = 5000      # CSV 스트리밍 시 한 번에 파싱할 행 수
+
+def _find_stock_columns(columns) -> tuple[str, str, str, str, str] | None:
+    """재고 시트 헤더에서 (SKU, 제품명, 바코드, 수량, 사업자번호) 열 이름을 유연하게 찾음"""
+    def find_column(possible_names: list[str]) -> str | None:
+        for key in possible_names:
+            for col in columns:
+                if key.strip().lower() in col.strip().lower():
+                    return col
+        return None
+
+    cols = (
+        find_column(["SKU", "상품코드"]),
+        find_column(["제품명", "상품명"]),
+        find_column(["바코드", "barcode"]),
+        find_column(["수량", "재고", "재고수량"]),
+        find_column(["사업자 번호", "사업자", "사업자등록번호"]),
+    )
+    return cols if all(cols) else None
+
+
+def load_stock_df_csv(biz_num: str, url: str = STOCK_SHEET_CSV,
+                      chunk_rows: int = CSV_CHUNK_ROWS) -> pd.DataFrame:
+    """
+    STOCK_SHEET_CSV 를 스트리밍으로 받아 chunk 단위로 파싱하면서 사업자번호로 바로 필터링.
+    시트 전체를 메모리에 올리지 않으므로 최대 메모리 사용량이 chunk 크기로 제한된다.
+    """
     try:
-        client = get_gspread_client()
-        sheet = client.open_by_key(SHEET_ID_MASTER)
+        with get_authorized_session().get(url, stream=True, timeout=60) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True   # gzip 응답도 그대로 파싱
+
+            parts = []
+            cols = None
+            reader = pd.read_csv(r.raw, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+            for chunk in reader:
+                if cols is None:
+                    cols = _find_stock_columns(chunk.columns)
+                    if cols is None:
+                        print("[재고 시트 오류] 필수 열 누락 - SKU, 제품명, 바코드, 수량, 사업자번호 중 하나가 없습니다.")
+                        return pd.DataFrame(columns=STOCK_RESULT_COLUMNS)
+                sku_col, name_col, bc_col, qty_col, biz_col = cols
+                hit = chunk[chunk[biz_col].str.strip() == biz_num]
+                if not hit.empty:
+                    parts.append(hit[[sku_col, name_col, bc_col, qty_col]])
+
+        if not parts:
+            print(f"[INFO] 재고 시트에 해당 사업자번호 {biz_num} 에 대한 데이터 없음")
+            return pd.DataFrame(columns=STOCK_RESULT_COLUMNS)
+
+        df_result = pd.concat(parts, ignore_index=True)
+        df_result.columns = STOCK_RESULT_COLUMNS
+        return df_result
+
+    except Exception as e:
+        print("[load_stock_df_csv 예외 발생]", type(e), e)
+        traceback.print_exc()
+        return pd.DataFrame(columns=STOCK_RESULT_COLUMNS)
+
+
+EXPORT_FORMATS = {"xlsx": ".xlsx", "csv": ".csv", "parquet": ".parquet"}
+
+# 재고/입출고 내보내기 전용 백그라운드 writer (파이프라인이 파일 저장을 기다리지 않도록)
+_EXPORT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stock_export")
+
+
+def _save_export(df: pd.DataFrame, path: Path, label: str):
+    if path.suffix == ".csv":
+        df.to_csv(path, index=False, encoding="utf-8-sig")   # 엑셀에서 한글 깨짐 방지
+    elif path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+    print(f"[INFO] {label} 저장 완료: {path}")
+
+
+def _log_export_error(fut, label: str, path: Path):
+    exc = fut.exception()
+    if exc is not None:
+        print(f"[WARN] {label} 저장 중 오류: {exc} ({path})")
 
+
+def load_stock_df(biz_num: str, save_excel: bool = True,
+                  max_age: float = MIRROR_MAX_AGE_SEC,
+                  export_format: str = "xlsx", background: bool = False) -> pd.DataFrame:
+    """
+    사업자번호별 재고 DataFrame 반환.
+    save_excel 이면 재고/입출고 파일을 export_format(xlsx/csv/parquet)으로 저장하고,
+    background=True 면 저장을 백그라운드 writer 에 넘기고 바로 반환한다.
+    지원하지 않는 export_format 이면 ValueError.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 저장 형식: {export_format!r} (가능: {', '.join(EXPORT_FORMATS)})")
+    try:
         # ─────────────────────────────
-        # ✅ 재고 리스트 처리
-        ws_stock = sheet.worksheet("재고 리스트")
-        data_stock = ws_stock.get_all_values()
-        header = data_stock[0]
-        records = data_stock[1:]
-
-        print(f"[DEBUG] 열 개수: {len(header)}")
-
-        df_stock = pd.DataFrame(records, columns=header).fillna("")
-
-        # 열 이름 유연하게 찾기
-        def find_column(possible_names: list[str]) -> str | None:
-            for key in possible_names:
-                for col in df_stock.columns:
-                    if key.strip().lower() in col.strip().lower():
-                        return col
-            return None
+        # ✅ 마스터 시트 → 로컬 미러 동기화 (실패 시 마지막 미러로 오프라인 조회)
+        try:
+            client = get_gspread_client()
+            sheet = client.open_by_key(SHEET_ID_MASTER)
+            stock_mirror.sync_master(sheet, max_age=max_age)
+        except Exception as e_sync:
+            print(f"[WARN] 마스터 시트 동기화 실패, 로컬 미러로 조회합니다: {e_sync}")
+
+        df_stock = stock_mirror.query_rows(stock_mirror.STOCK_SHEET, biz_num)
 
-        sku_col  = find_column(["SKU", "상품코드"])
-        name_col = find_column(["제품명", "상품명"])
-        bc_col   = find_column(["바코드", "barcode"])
-        qty_col  = find_column(["수량", "재고", "재고수량"])
-        biz_col  = find_column(["사업자 번호", "사업자", "사업자등록번호"])
+        print(f"[DEBUG] 열 개수: {len(df_stock.columns)}")
 
-        if not all([sku_col, name_col, bc_col, qty_col, biz_col]):
+        cols = _find_stock_columns(df_stock.columns)
+        if cols is None:
             print("[재고 시트 오류] 필수 열 누락 - SKU, 제품명, 바코드, 수량, 사업자번호 중 하나가 없습니다.")
-            return pd.DataFrame(columns=["SKU", "상품명", "바코드", "수량"])
+            return pd.DataFrame(columns=STOCK_RESULT_COLUMNS)
+        sku_col, name_col, bc_col, qty_col, biz_col = cols
 
         df_filtered = df_stock[df_stock[biz_col].astype(str).str.strip() == biz_num]
 
         if df_filtered.empty:
             print(f"[INFO] 재고 시트에 해당 사업자번호 {biz_num} 에 대한 데이터 없음")
-            return pd.DataFrame(columns=["SKU", "상품명", "바코드", "수량"])
+            return pd.DataFrame(columns=STOCK_RESULT_COLUMNS)
 
         df_result = df_filtered[[sku_col, name_col, bc_col, qty_col]]
-        df_result.columns = ["SKU", "상품명", "바코드", "수량"]
+        df_result.columns = STOCK_RESULT_COLUMNS
 
         # ─────────────────────────────
-        # ✅ 저장: 재고 + 입출고
+        # ✅ 저장: 재고 + 입출고 (두 파일 병렬 저장)
         if save_excel:
+            ext = EXPORT_FORMATS[export_format]
             if getattr(sys, 'frozen', False):
                 # PyInstaller 실행 중
                 base_dir = Path(sys.executable).parent
@@ -248,16 +1312,13 @@ def load_stock_df(biz_num: str, save_excel: bool = True) -> pd.DataFrame:
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
             rand_suffix = randint(1000, 9999)
 
-            stock_path = save_dir / f"재고_{biz_num}_{ts}_{rand_suffix}.xlsx"
-            df_result.to_excel(stock_path, index=False)
-            print(f"[INFO] 재고 저장 완료: {stock_path}")
+            stock_path = save_dir / f"재고_{biz_num}_{ts}_{rand_suffix}{ext}"
+            exports = [(df_result.copy(), stock_path, "재고")]
 
             # ─────────────────────────────
             # ✅ 입출고 리스트 처리
             try:
-                ws_inout = sheet.worksheet("입출고 리스트")
-                data_inout = ws_inout.get_all_values()
-                df_inout = pd.DataFrame(data_inout[1:], columns=data_inout[0]).fillna("")
+                df_inout = stock_mirror.query_rows(stock_mirror.INOUT_SHEET, biz_num)
 
                 biz_col_io = next((c for c in df_inout.columns if "사업자 번호" in c), None)
 
@@ -265,20 +1326,29 @@ def load_stock_df(biz_num: str, save_excel: bool = True) -> pd.DataFrame:
                     df_filtered_io = df_inout[df_inout[biz_col_io].astype(str).str.strip() == biz_num]
 
                     if not df_filtered_io.empty:
-                        io_path = save_dir / f"입출고리스트_{biz_num}_{ts}_{rand_suffix}.xlsx"
-                        df_filtered_io.to_excel(io_path, index=False)
-                        print(f"[INFO] 입출고리스트 저장 완료: {io_path}")
+                        io_path = save_dir / f"입출고리스트_{biz_num}_{ts}_{rand_suffix}{ext}"
+                        exports.append((df_filtered_io, io_path, "입출고리스트"))
                 else:
                     print("[INFO] 입출고리스트에서 '사업자 번호' 열을 찾지 못했습니다.")
             except Exception as e_io:
                 print(f"[WARN] 입출고리스트 시트 처리 중 오류: {e_io}")
 
+            futures = [_EXPORT_POOL.submit(_save_export, *job) for job in exports]
+            for fut, (_, path, label) in zip(futures, exports):
+                if background:
+                    fut.add_done_callback(lambda f, label=label, path=path: _log_export_error(f, label, path))
+                else:
+                    try:
+                        fut.result()
+                    except Exception as e_save:
+                        print(f"[WARN] {label} 저장 중 오류: {e_save} ({path})")
+
         return df_result
 
     except Exception as e:
         print("[load_stock_df 예외 발생]", type(e), e)
         traceback.print_exc()
-        return pd.DataFrame(columns=["SKU", "상품명", "바코드", "수량"])
+        return pd.DataFrame(columns=STOCK_RESULT_COLUMNS)
 
 
 # ─── 설정 다이얼로그 ─────────────────────────────────────────
@@ -313,12 +1383,16 @@ class SettingsDialog(QDialog):
             QMessageBox.warning(self, "경고", "쿠팡 ID/PW를 입력하세요."); return
         if not self.le_biz.text().strip():
             QMessageBox.warning(self, "경고", "사업자번호를 입력하세요."); return
-        data = {
+        data = {}
+        if os.path.exists(CONFIG_FILE):   # 다이얼로그에 없는 옵션(upload_as_zip, export_format 등)은 유지
+            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        data.update({
             "business_number": self.le_biz.text().strip(), 
             "coupang_id": self.le_id.text().strip(),
             "coupang_pw": self.le_pw.text().strip(),
             "brand_name": self.le_brand.text().strip(),
-        }
+        })
         with open(CONFIG_FILE, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         self.accept()
@@ -420,11 +1494,17 @@ class OrderApp(QMainWindow):
         self.order_zip_path = None
         self.coupang_id = self.coupang_pw = ""
         self.brand_name = ""
+        self.upload_as_zip = False   # True: shipment 문서를 ZIP 하나로 스트리밍 업로드
+        self.crawl_workers = CRAWL_WORKERS
+        self.reuse_browser_profile = False   # True: 프로필 유지 → 세션이 살아 있으면 로그인 생략
+        self.fast_crawl = False              # True: 로그인 후 headless 브라우저로 전환 + 이미지·폰트 차단
+        self.export_format = "xlsx"          # 재고/입출고 저장 형식 (EXPORT_FORMATS: xlsx/csv/parquet)
 
         # 런타임
         self.orders_data = {}
         self.cached_shipment = {}
         self.driver = None
+        self.download_dir = None      # 실행마다 새로 만드는 Chrome 전용 다운로드 폴더
 
         self.processed_files = set()  # ✅ 이미 처리한 파일 캐시
         self.cached_stock_df = None   # ✅ 재고 데이터 캐시
@@ -482,7 +1562,8 @@ class OrderApp(QMainWindow):
             QMessageBox.warning(self, "사업자번호 없음", "먼저 설정에서 사업자번호를 입력하세요.")
             return
         try:
-            result_df = load_stock_df(self.business_number, save_excel=True) 
+            result_df = load_stock_df(self.business_number, save_excel=True, max_age=0,
+                                      export_format=self.export_format)
             if result_df.empty:
                 QMessageBox.information(self, "완료", "해당 사업자의 재고 데이터가 없습니다.")
             else:
@@ -502,6 +1583,11 @@ class OrderApp(QMainWindow):
             self.coupang_pw = d.get("coupang_pw", "")
             self.brand_name = d.get("brand_name", "")
             self.business_number = d.get("business_number", "")
+            self.upload_as_zip = d.get("upload_as_zip", False)
+            self.crawl_workers = int(d.get("crawl_workers", CRAWL_WORKERS))
+            self.reuse_browser_profile = d.get("reuse_browser_profile", False)
+            self.fast_crawl = d.get("fast_crawl", False)
+            self.export_format = d.get("export_format", "xlsx")
             self.le_brand.setText(self.brand_name)
         self._enable_run()
 
@@ -768,7 +1854,8 @@ class OrderApp(QMainWindow):
 
             if not self.skip_inventory_check:
                 try:
-                    self.cached_stock_df = load_stock_df(self.business_number)  # ✅ 캐시에 저장
+                    self.cached_stock_df = load_stock_df(self.business_number, background=True,
+                                                         export_format=self.export_format)  # ✅ 캐시에 저장 (파일 저장은 백그라운드)
                     if self.cached_stock_df.empty:
                         QMessageBox.warning(self, "재고 시트 비어 있음", "현재 재고 시트에 데이터가 없습니다.\n계속 진행은 가능하지만 재고 확인은 생략됩니다.")
                 except Exception as e:
@@ -778,15 +1865,24 @@ class OrderApp(QMainWindow):
 
             print("[first_phase] Selenium 드라이버 시작")
 
-            options = ChromeOptions()
-            options.add_argument("--start-maximized")
+            # 이번 실행 전용 다운로드 폴더 → ~/Downloads 전체를 뒤지거나 " (1)" 중복본을 지울 필요 없음
+            self.download_dir = tempfile.mkdtemp(prefix="coupang_dl_")
             try:
-                self.driver = webdriver.Chrome(options=options)
+                self.driver = webdriver.Chrome(
+                    options=self._chrome_options(use_profile=self.reuse_browser_profile)
+                )
                 print("[first_phase] 드라이버 실행 완료")
             except Exception as e:
                 raise Exception(f"ChromeDriver 실행 실패: {e}")
 
-            self.driver.implicitly_wait(5)
+            # 저장된 프로필의 세션이 아직 유효하면 로그인 없이 바로 크롤 시작
+            # (요소 대기는 전역 implicit wait 없이 모두 WaitPolicy 로 처리)
+            waits.reset()
+            if self.reuse_browser_profile and supplier_session_valid(self.driver):
+                print("[first_phase] 기존 세션 유효 → 로그인 생략")
+                self.second_phase()
+                return
+
             oauth_url = (
                 "https://xauth.coupang.com/auth/realms/seller/"
                 "protocol/openid-connect/auth?response_type=code&client_id=supplier-hub"
@@ -800,7 +1896,8 @@ class OrderApp(QMainWindow):
 
             if self.coupang_id and self.coupang_pw:
                 try:
-                    WebDriverWait(self.driver, 15).until(
+                    waits.until(
+                        self.driver, "login_form",
                         EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='username']"))
                     ).send_keys(self.coupang_id)
                     self.driver.find_element(By.CSS_SELECTOR, "input[name='password']").send_keys(self.coupang_pw)
@@ -832,96 +1929,189 @@ class OrderApp(QMainWindow):
             driver = self.driver
             self.progressUpdated.emit(30)
 
+            if self.fast_crawl:   # 로그인은 끝났으므로 이제부터는 headless + 폼 조작에 필요 없는 리소스 차단
+                try:
+                    driver = self._relaunch_headless()
+                except Exception as e:
+                    print(f"[경고] headless 전환 실패 (보이는 브라우저로 진행): {e}")
+                try:
+                    block_heavy_resources(driver)
+                except Exception as e:
+                    print(f"[경고] 리소스 차단 실패 (일반 모드로 진행): {e}")
+
             driver.get("https://supplier.coupang.com/dashboard/KR")
 
             # 2-1) Logistics → Shipments 메뉴 진입
             try:
-                btn_logistics = WebDriverWait(driver, 15).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href='/logistics']"))
+                btn_logistics = waits.until(
+                    driver, "menu", EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href='/logistics']"))
                 ); btn_logistics.click()
 
-                btn_shipments = WebDriverWait(driver, 15).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href='/ibs/asn/active']"))
+                btn_shipments = waits.until(
+                    driver, "menu", EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href='/ibs/asn/active']"))
                 ); btn_shipments.click()
             except Exception:
                 raise Exception("메뉴 클릭 실패 (Logistics → Shipments)")
 
-            # 2-2) 발주번호 입력창 확인
+            # 2-2) 이전 실행에서 찾은 쉽먼트번호는 캐시에서, 나머지만 목록 한 번으로 일괄 매핑
+            #      (목록에도 없으면 발주번호 검색으로 보완)
+            order_keys = {
+                po_no: (str(info["center"]), info["eta"].strftime("%Y-%m-%d") if info["eta"] else "")
+                for po_no, info in self.orders_data.items()
+            }
+            shipments = shipment_cache.lookup(order_keys)
+            unresolved = [po_no for po_no in self.orders_data if po_no not in shipments]
+            if unresolved:
+                found = resolve_shipments_bulk(driver, unresolved)
+                shipments.update(found)
+                shipment_cache.store({po_no: (sn, *order_keys[po_no]) for po_no, sn in found.items()})
+
             try:
-                search_input = WebDriverWait(driver, 15).until(
+                search_input = waits.until(
+                    driver, "search_input",
                     EC.presence_of_element_located((By.CSS_SELECTOR, "input#purchaseOrderSeq"))
                 )
             except:
                 raise Exception("발주번호 입력창을 찾지 못했습니다.")
 
             # 2-3) 다운로드 폴더
-            download_dir = os.path.join(os.path.expanduser("~"), "Downloads")
+            download_dir = self.download_dir
             target_dir   = os.path.join(os.getcwd(), "shipment"); os.makedirs(target_dir, exist_ok=True)
 
-            # 2-4) 주문별 라벨/매니페스트 다운로드
-            total = len(self.orders_data)
-            for idx, (po_no, info) in enumerate(self.orders_data.items()):
-                search_input.clear(); search_input.send_keys(po_no)
-                driver.find_element(By.CSS_SELECTOR, "button#shipment-search-btn").click()
+            # 2-4) 업로드 파이프라인: 다운로드가 끝난 파일부터 바로 Drive 로 전송
+            #      (ZIP 모드는 크롤 후 ZIP 하나로 스트리밍 업로드하므로 파이프라인 없음)
+            drive_folder_id = create_drive_folder("shipment")  # 아무 이름 넣어도 됨
+            pipeline = None
+            crawl_done = threading.Event()
+            upload_progress = {"done": 0, "total": 0}
+            if not self.upload_as_zip:
+                def on_uploaded(done, total, _name):
+                    upload_progress.update(done=done, total=total)
+                    if crawl_done.is_set():   # 크롤 중(30→70)에는 크롤 진행률을 우선 표시
+                        self.progressUpdated.emit(70 + int(done / total * 25))
 
                 try:
-                    first_td = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR,
-                            "table#parcel-tab tbody tr:first-child td:first-child"))
-                    ); shipment_no = first_td.text.strip()
-                except:
-                    shipment_no = ""
-
-                center, eta = info["center"], info["eta"]
-                key = f"{center}|{eta.strftime('%Y-%m-%d') if eta else ''}"
-                self.cached_shipment[key] = shipment_no
-                self.orders_data[po_no]["shipment"] = shipment_no
-
-                if shipment_no:
-                    try:
-                        driver.execute_script(
-                            f"window.open('https://supplier.coupang.com/ibs/shipment/parcel/"
-                            f"pdf-label/generate?parcelShipmentSeq={shipment_no}', '_blank');"
-                        ); time.sleep(1.5)
-                        driver.execute_script(
-                            f"window.open('https://supplier.coupang.com/ibs/shipment/parcel/"
-                            f"pdf-manifest/generate?parcelShipmentSeq={shipment_no}', '_blank');"
-                        ); time.sleep(1.5)
-                    except Exception as e:
-                        print(f"[경고] {shipment_no} 다운로드 중 오류: {e}")
-
-                percent = 30 + int((idx + 1) / total * 40)
-                self.progressUpdated.emit(percent)
-
-            # 2-5) 다운로드 완료 대기 후 정리
-            time.sleep(5)
-            dup_pat = re.compile(r"\s\(\d+\)(\.[^.]+)$")
-
-            for fname in os.listdir(download_dir):
-                low = fname.lower()
-                if not (low.startswith("shipment_label_document") or
-                        low.startswith("shipment_manifest_document")):
-                    continue
-                src = os.path.join(download_dir, fname)
-
-                if dup_pat.search(fname):   # 중복본 삭제
-                    try: os.remove(src)
-                    except FileNotFoundError: pass
-                    continue
-
-                shutil.move(src, os.path.join(target_dir, fname))
-
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            drive_folder_name = f"shipment_{ts}"
+                    pipeline = DriveUploadPipeline(drive_folder_id, skip_unchanged=True,
+                                                   progress_cb=on_uploaded)
+                except Exception as e:
+                    raise RuntimeError(f"Google Drive 업로드 실패: {e}") from e
+
+                for fname in sorted(os.listdir(target_dir)):   # 이전 실행에서 남은 파일 (변경 없으면 건너뜀)
+                    path = os.path.join(target_dir, fname)
+                    if os.path.isfile(path):
+                        pipeline.submit(path)
+
+            # 이번 실행에서 저장·이동한 문서 (ZIP 모드는 이것만 묶음 → 이전 실행 문서가 계속 쌓이지 않음)
+            run_files, run_files_lock = [], threading.Lock()
+
+            def collect(path):
+                with run_files_lock:
+                    if path not in run_files:
+                        run_files.append(path)
+                if pipeline:
+                    pipeline.submit(path)
+
+            watcher = DownloadWatcher(download_dir, target_dir, on_moved=collect).start()
+
+            # 2-5) 라벨/매니페스트는 브라우저 쿠키를 복사한 세션으로 target_dir 에 직접 저장
+            fetcher = ShipmentPdfFetcher(driver, target_dir, on_saved=collect)
+
+            # 체크포인트상 이미 받은 문서(파일이 남아 있는 것)는 다시 받지 않음
+            fetched, fetched_lock = set(), threading.Lock()
+
+            def fetch_docs(shipment_no, saved):
+                """쉽먼트 문서를 백그라운드로 받기 시작 (여러 발주가 같은 쉽먼트를 공유 → 한 번만)"""
+                with fetched_lock:
+                    if not shipment_no or shipment_no in fetched:
+                        return
+                    fetched.add(shipment_no)
+                skip = set()
+                for doc, fname in saved.get(shipment_no, {}).items():
+                    path = os.path.join(target_dir, fname)
+                    if os.path.exists(path):   # 이전(실패한) 실행에서 받은 이번 배치 문서
+                        skip.add(doc)
+                        with run_files_lock:
+                            if path not in run_files:
+                                run_files.append(path)
+                fetcher.submit(shipment_no, skip=skip)
 
             try:
-                drive_folder_id = create_drive_folder("shipment")  # 아무 이름 넣어도 됨
-                upload_folder_to_drive(target_dir, drive_folder_id)
+                # 캐시·목록으로 이미 아는 쉽먼트는 개별 검색을 기다리지 않고 바로 PDF 수신 시작
+                saved = shipment_cache.saved_docs(shipments.values())
+                for shipment_no in shipments.values():
+                    fetch_docs(shipment_no, saved)
+
+                # 캐시·목록에 없던 발주번호는 브라우저 여러 개로 나눠 개별 검색 (진행률은 합산해서 표시)
+                total = len(self.orders_data)
+                remaining = [po_no for po_no in self.orders_data if po_no not in shipments]
+                resolved = total - len(remaining)
+                if remaining:
+                    def on_searched(done, po_no, shipment_no):
+                        # 체크포인트: 찾는 즉시 저장 → 중간에 실패해도 재실행 때 다시 검색하지 않음
+                        shipment_cache.store({po_no: (shipment_no, *order_keys[po_no])})
+                        if shipment_no:   # 찾는 대로 PDF 수신 시작 (검색 워커 스레드에서 호출됨)
+                            fetch_docs(shipment_no, shipment_cache.saved_docs([shipment_no]))
+                        self.progressUpdated.emit(30 + int((resolved + done) / total * 40))
+
+                    pool = ShipmentSearchPool(
+                        driver, search_input,
+                        make_driver=lambda: webdriver.Chrome(options=self._chrome_options(light=self.fast_crawl)),
+                        workers=self.crawl_workers, on_done=on_searched
+                    )
+                    shipments.update(pool.search_all(remaining))
+                    if pool.failed:
+                        print(f"[경고] 쉽먼트 검색 실패 {len(pool.failed)}건 (다음 실행 때 다시 시도): "
+                              f"{', '.join(pool.failed)}")
+
+                for po_no, info in self.orders_data.items():
+                    shipment_no = shipments.get(po_no, "")
+                    center, eta = info["center"], info["eta"]
+                    key = f"{center}|{eta.strftime('%Y-%m-%d') if eta else ''}"
+                    self.cached_shipment[key] = shipment_no
+                    self.orders_data[po_no]["shipment"] = shipment_no
+                self.progressUpdated.emit(70)
+
+                # 2-6) 직접 다운로드 실패분(세션 만료 등)만 브라우저 탭으로 다시 받음
+                #      → watcher 가 실제로 도착한 파일을 세어 다 받을 때까지만 대기
+                failed = fetcher.close()
+                failed_docs = {}
+                for shipment_no, prefix in failed:
+                    failed_docs.setdefault(shipment_no, []).append(prefix)
+                # 문서를 못 받은 쉽먼트는 다음 실행 때 다시 조회 (받은 문서의 체크포인트는 유지)
+                shipment_cache.invalidate(failed_docs, docs=False)
+                shipment_cache.drop_docs(failed)
+                for shipment_no, prefixes in failed_docs.items():
+                    self._open_pdf_tabs(shipment_no, watcher, prefixes)
+                watcher.wait()
+            except Exception:
+                with contextlib.suppress(Exception):
+                    fetcher.close()
+                watcher.stop()
+                if pipeline:
+                    with contextlib.suppress(Exception):
+                        pipeline.close()
+                raise
+
+            watcher.stop()   # 종료 전 마지막으로 한 번 더 수거
+            crawl_done.set()
+            if upload_progress["total"]:   # 크롤 중에 끝난 업로드만큼 진행률 반영
+                self.progressUpdated.emit(70 + int(upload_progress["done"] / upload_progress["total"] * 25))
+
+            # 2-7) 남은 업로드 완료 대기 (ZIP 모드: 이번 실행 문서만 ZIP 하나로 스트리밍)
+            try:
+                if pipeline:
+                    pipeline.close()
+                else:
+                    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    doc_paths = sorted(p for p in run_files if os.path.isfile(p))
+                    stream_zip_to_drive(doc_paths, f"shipment_{ts}.zip", drive_folder_id)
                 print(f"📁 Google Drive 업로드 완료: 공유폴더")
             except Exception as e:
                 raise RuntimeError(f"Google Drive 업로드 실패: {e}") from e
 
-            driver.quit(); self.driver = None
+            shipment_cache.clear_docs(shipments.values())   # 끝까지 성공 → 문서 체크포인트 정리
+
+            self._quit_driver()
             self.progressUpdated.emit(100)
             self.crawlFinished.emit("전송 완료!")
 
@@ -929,6 +2119,63 @@ class OrderApp(QMainWindow):
             print("crawl_and_generate 예외 발생:", e)
             self.crawlError.emit(str(e))
 
+    def _relaunch_headless(self):
+        """
+        로그인된 메인 브라우저의 쿠키(CDP)를 headless 브라우저에 심고 메인 브라우저를 교체.
+        ShipmentSearchPool._spawn_driver 와 같은 방식이라 다시 로그인하지 않는다 (프로필은 보이는 브라우저에만 남음).
+        """
+        cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        drv = webdriver.Chrome(options=self._chrome_options(light=True))
+        try:
+            drv.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+        except Exception:
+            drv.quit()
+            raise
+        visible, self.driver = self.driver, drv
+        with contextlib.suppress(Exception):
+            visible.quit()
+        print("[INFO] 로그인 완료 → headless 브라우저로 전환")
+        return drv
+
+    def _chrome_options(self, use_profile=False, light=False):
+        """
+        use_profile=True 는 메인 브라우저 전용 (같은 프로필은 Chrome 하나만 열 수 있음).
+        light=True 는 로그인 뒤의 메인·보조 브라우저용: headless + 이미지 끔 + DOM 준비 시점에 진행.
+        """
+        options = ChromeOptions()
+        prefs = {
+            "download.default_directory": self.download_dir,
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "plugins.always_open_pdf_externally": True,   # PDF 를 뷰어로 열지 않고 바로 저장
+        }
+        if light:
+            options.add_argument("--headless=new")
+            options.add_argument("--window-size=1280,900")
+            options.add_argument("--disable-extensions")
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.page_load_strategy = "eager"
+            prefs["profile.managed_default_content_settings.images"] = 2
+        else:
+            options.add_argument("--start-maximized")
+        if use_profile:
+            options.add_argument(f"--user-data-dir={BROWSER_PROFILE_DIR}")
+        options.add_experimental_option("prefs", prefs)
+        return options
+
+    def _open_pdf_tabs(self, shipment_no, watcher, prefixes=None):
+        """브라우저 탭으로 라벨/매니페스트 다운로드 (직접 다운로드 실패 시 대체 경로, prefixes 가 있으면 그 문서만)"""
+        for prefix, path in SHIPMENT_PDF_ENDPOINTS:
+            if prefixes is not None and prefix not in prefixes:
+                continue
+            try:
+                self.driver.execute_script(
+                    f"window.open('{PORTAL_BASE_URL}{path}?parcelShipmentSeq={shipment_no}', '_blank');"
+                )
+                watcher.expect()
+            except Exception as e:
+                print(f"[경고] {shipment_no} 다운로드 중 오류: {e}")
+
     # ──────────────────────────────────────────────────────────
     # 3) 3PL 신청서 & 주문서 생성
     # ──────────────────────────────────────────────────────────
@@ -1174,6 +2421,17 @@ class OrderApp(QMainWindow):
     # ──────────────────────────────────────────────────────────
     # 크롤 완료/오류 콜백 및 버튼 리셋
     # ──────────────────────────────────────────────────────────
+    def _dump_api_metrics(self):
+        """이번 실행의 Google API 요청 지표와 브라우저 대기 시간 지표 출력 후 초기화"""
+        summary = google_auth_httplib2.metrics.format()
+        if summary:
+            print("[API 지표]\n" + summary)
+        google_auth_httplib2.metrics.reset()
+        summary = waits.format()
+        if summary:
+            print("[브라우저 대기 지표]\n" + summary)
+        waits.reset()
+
     def _crawl_ok(self, msg: str):
         self.progress.setVisible(False)
 
@@ -1185,6 +2443,7 @@ class OrderApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "주문서 오류", str(e))
 
+        self._dump_api_metrics()
         self._reset_btn()
 
     def _crawl_err(self, msg: str):
@@ -1192,10 +2451,19 @@ class OrderApp(QMainWindow):
         if not msg.strip():  # 빈 문자열이면
             msg = "에러 발생 (상세 메시지 없음)"
         QMessageBox.critical(self, "크롤 오류", msg)
+        self._quit_driver()
+        self._dump_api_metrics()
+        self._reset_btn()
+
+    def _quit_driver(self):
+        """브라우저 종료 + 이번 실행용 다운로드 폴더 삭제"""
         if self.driver:
-            self.driver.quit()
+            with contextlib.suppress(Exception):
+                self.driver.quit()
             self.driver = None
-        self._reset_btn()
+        if self.download_dir:
+            shutil.rmtree(self.download_dir, ignore_errors=True)
+            self.download_dir = None
 
     def _reset_btn(self):
         self.btn_run.setText("일괄 처리")
@@ -1224,6 +2492,7 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # 최신이면 본 프로그램 실행
+    get_google_credentials()   # 토큰 캐시 로드 + 백그라운드 갱신 시작
     win = OrderApp()
     win.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,184 @@
+# shipment_cache.py
+#
+# 발주번호 → 쉽먼트번호 로컬 SQLite 캐시 (실행 간 유지).
+#   • 물류센터 / 입고예정일까지 함께 저장해, 발주 내용이 바뀐 PO 는 캐시를 쓰지 않음
+#   • TTL 이 지난 항목은 다시 크롤링
+#   • 라벨/매니페스트를 받지 못한 쉽먼트(취소·변경 등)는 invalidate 로 삭제
+# 쉽먼트번호를 못 찾은 PO 는 저장하지 않으므로 재실행 시 미해결 PO 만 크롤링한다.
+#
+# shipment_docs 는 크롤 체크포인트: 라벨/매니페스트를 받을 때마다 기록해 두고,
+# 크롤이 중간에 실패해 다시 실행하면 이미 받은 문서는 건너뛴다 (크롤이 끝까지 성공하면 삭제).
+
+import os, sys, sqlite3, threading, time
+from typing import Iterable, Optional
+
+SHIPMENT_CACHE_TTL = 3 * 24 * 3600   # 3일
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS po_shipment (
+    po_no       TEXT PRIMARY KEY,
+    shipment_no TEXT NOT NULL,
+    center      TEXT NOT NULL,
+    eta         TEXT NOT NULL,
+    resolved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_po_shipment_no ON po_shipment(shipment_no);
+CREATE TABLE IF NOT EXISTS shipment_docs (
+    shipment_no TEXT NOT NULL,
+    doc         TEXT NOT NULL,
+    filename    TEXT NOT NULL,
+    saved_at    REAL NOT NULL,
+    PRIMARY KEY (shipment_no, doc)
+);
+"""
+
+_LOCK = threading.Lock()
+
+
+def get_db_path() -> str:
+    if getattr(sys, "frozen", False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, "shipment_cache.db")
+
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path or get_db_path())
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def lookup(orders: dict[str, tuple[str, str]], max_age: float = SHIPMENT_CACHE_TTL,
+           db_path: Optional[str] = None) -> dict[str, str]:
+    """
+    {발주번호: (물류센터, 입고예정일)} → 캐시에 유효한 항목만 {발주번호: 쉽먼트번호}.
+    TTL 초과 또는 물류센터·입고예정일이 달라진 항목은 삭제하고 결과에서 뺀다.
+    """
+    now = time.time()
+    found, changed, expired = {}, [], 0
+    pos = list(orders)
+    with _LOCK:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                expired = conn.execute(
+                    "DELETE FROM po_shipment WHERE resolved_at < ?", (now - max_age,)
+                ).rowcount
+                for i in range(0, len(pos), 500):   # SQLite 변수 개수 제한
+                    chunk = pos[i:i + 500]
+                    rows = conn.execute(
+                        "SELECT po_no, shipment_no, center, eta FROM po_shipment "
+                        f"WHERE po_no IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    for po_no, shipment_no, center, eta in rows:
+                        if orders[po_no] == (center, eta):
+                            found[po_no] = shipment_no
+                        else:
+                            changed.append((po_no,))
+                conn.executemany("DELETE FROM po_shipment WHERE po_no = ?", changed)
+        finally:
+            conn.close()
+
+    print(f"[INFO] 쉽먼트 캐시: {len(found)}/{len(orders)}건 사용, 만료 {expired}건·변경 {len(changed)}건 삭제")
+    return found
+
+
+def store(entries: dict[str, tuple[str, str, str]], db_path: Optional[str] = None):
+    """{발주번호: (쉽먼트번호, 물류센터, 입고예정일)} 저장 (쉽먼트번호가 빈 항목은 무시)"""
+    now = time.time()
+    records = [
+        (po_no, shipment_no, center, eta, now)
+        for po_no, (shipment_no, center, eta) in entries.items() if shipment_no
+    ]
+    with _LOCK:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO po_shipment (po_no, shipment_no, center, eta, resolved_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    records
+                )
+        finally:
+            conn.close()
+
+
+def invalidate(shipment_nos: Iterable[str] = (), docs: bool = True, db_path: Optional[str] = None):
+    """
+    쉽먼트번호로 캐시 항목 삭제 (다운로드 실패 등으로 더 이상 믿을 수 없는 매핑).
+    docs=False 면 문서 체크포인트는 남김 (받은 문서는 재실행 때 다시 받지 않도록).
+    """
+    keys = [(str(s),) for s in shipment_nos]
+    if not keys:
+        return
+    with _LOCK:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                conn.executemany("DELETE FROM po_shipment WHERE shipment_no = ?", keys)
+                if docs:
+                    conn.executemany("DELETE FROM shipment_docs WHERE shipment_no = ?", keys)
+        finally:
+            conn.close()
+
+
+def drop_docs(entries: Iterable[tuple[str, str]], db_path: Optional[str] = None):
+    """[(쉽먼트번호, doc)] 문서 체크포인트만 삭제 (받지 못한 문서)"""
+    keys = [(str(s), doc) for s, doc in entries]
+    if not keys:
+        return
+    with _LOCK:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                conn.executemany("DELETE FROM shipment_docs WHERE shipment_no = ? AND doc = ?", keys)
+        finally:
+            conn.close()
+
+
+def mark_doc(shipment_no: str, doc: str, filename: str, db_path: Optional[str] = None):
+    """체크포인트: shipment_no 의 doc(라벨/매니페스트 접두어) 를 filename 으로 받았음"""
+    with _LOCK:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO shipment_docs (shipment_no, doc, filename, saved_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (str(shipment_no), doc, filename, time.time())
+                )
+        finally:
+            conn.close()
+
+
+def saved_docs(shipment_nos: Iterable[str], db_path: Optional[str] = None) -> dict[str, dict[str, str]]:
+    """체크포인트 조회: {쉽먼트번호: {doc: filename}}"""
+    keys = [str(s) for s in set(shipment_nos) if s]
+    docs: dict[str, dict[str, str]] = {}
+    conn = _connect(db_path)
+    try:
+        for i in range(0, len(keys), 500):   # SQLite 변수 개수 제한
+            chunk = keys[i:i + 500]
+            for shipment_no, doc, filename in conn.execute(
+                "SELECT shipment_no, doc, filename FROM shipment_docs "
+                f"WHERE shipment_no IN ({','.join('?' * len(chunk))})", chunk
+            ):
+                docs.setdefault(shipment_no, {})[doc] = filename
+    finally:
+        conn.close()
+    return docs
+
+
+def clear_docs(shipment_nos: Iterable[str], db_path: Optional[str] = None):
+    """크롤이 끝까지 성공한 뒤 해당 쉽먼트들의 문서 체크포인트 삭제"""
+    keys = [(str(s),) for s in set(shipment_nos) if s]
+    if not keys:
+        return
+    with _LOCK:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                conn.executemany("DELETE FROM shipment_docs WHERE shipment_no = ?", keys)
+        finally:
+            conn.close()
@@ -0,0 +1,158 @@
+# stock_mirror.py
+#
+# 마스터 시트('재고 리스트', '입출고 리스트')의 로컬 SQLite 미러.
+#   • 재고 리스트 : 값이 수시로 바뀌므로 동기화마다 전체 교체
+#   • 입출고 리스트: 추가만 되는 로그이므로 마지막 동기화 이후의 행만 받아서 append
+# 사업자번호 / 바코드에 인덱스를 걸어 두어 오프라인에서도 바로 조회된다.
+
+import os, sys, json, sqlite3, threading, time
+import pandas as pd
+from typing import Optional
+
+STOCK_SHEET = "재고 리스트"
+INOUT_SHEET = "입출고 리스트"
+
+_BIZ_KEYS     = ["사업자 번호", "사업자", "사업자등록번호"]
+_BARCODE_KEYS = ["바코드", "barcode"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheet_meta (
+    sheet     TEXT PRIMARY KEY,
+    header    TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sheet_rows (
+    sheet   TEXT NOT NULL,
+    row_no  INTEGER NOT NULL,
+    biz_num TEXT,
+    barcode TEXT,
+    data    TEXT NOT NULL,
+    PRIMARY KEY (sheet, row_no)
+);
+CREATE INDEX IF NOT EXISTS idx_rows_biz     ON sheet_rows(sheet, biz_num);
+CREATE INDEX IF NOT EXISTS idx_rows_barcode ON sheet_rows(sheet, barcode);
+"""
+
+_LOCK = threading.Lock()
+
+
+def get_db_path() -> str:
+    if getattr(sys, "frozen", False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, "master_mirror.db")
+
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path or get_db_path())
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _find_index(header: list[str], keys: list[str]) -> Optional[int]:
+    for key in keys:
+        for i, col in enumerate(header):
+            if key.strip().lower() in str(col).strip().lower():
+                return i
+    return None
+
+
+def _store_rows(conn, sheet: str, header: list[str], rows: list[list[str]], start: int):
+    """start 이후 행 번호로 rows 저장 (start == 0 이면 기존 데이터 전체 교체)"""
+    width = len(header)
+    biz_idx = _find_index(header, _BIZ_KEYS)
+    bc_idx = _find_index(header, _BARCODE_KEYS)
+
+    if start == 0:
+        conn.execute("DELETE FROM sheet_rows WHERE sheet = ?", (sheet,))
+
+    records = []
+    for offset, row in enumerate(rows):
+        row = (row + [""] * width)[:width]
+        biz = str(row[biz_idx]).strip() if biz_idx is not None else None
+        bc = str(row[bc_idx]).strip() if bc_idx is not None else None
+        records.append((sheet, start + offset, biz, bc, json.dumps(row, ensure_ascii=False)))
+    conn.executemany(
+        "INSERT OR REPLACE INTO sheet_rows (sheet, row_no, biz_num, barcode, data) VALUES (?, ?, ?, ?, ?)",
+        records
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO sheet_meta (sheet, header, row_count, synced_at) VALUES (?, ?, ?, ?)",
+        (sheet, json.dumps(header, ensure_ascii=False), start + len(rows), time.time())
+    )
+
+
+def _load_meta(conn, sheet: str) -> Optional[dict]:
+    row = conn.execute(
+        "SELECT header, row_count, synced_at FROM sheet_meta WHERE sheet = ?", (sheet,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {"header": json.loads(row[0]), "row_count": row[1], "synced_at": row[2]}
+
+
+def sync_master(spreadsheet, full: bool = False, max_age: float = 0,
+                db_path: Optional[str] = None) -> bool:
+    """
+    gspread Spreadsheet → 로컬 미러 동기화.
+      • max_age 초 이내에 동기화한 적이 있으면 건너뜀 (False 반환)
+      • full=True 또는 입출고 헤더가 바뀐 경우 입출고 리스트 전체 재동기화
+    """
+    with _LOCK:
+        conn = _connect(db_path)
+        try:
+            stock_meta = _load_meta(conn, STOCK_SHEET)
+            inout_meta = _load_meta(conn, INOUT_SHEET)
+
+            if (not full and max_age > 0 and stock_meta and inout_meta
+                    and time.time() - min(stock_meta["synced_at"], inout_meta["synced_at"]) < max_age):
+                return False
+
+            start = inout_meta["row_count"] if (inout_meta and not full) else 0
+
+            # 재고 전체 + 입출고 헤더 + 입출고 신규 행을 batchGet 한 번으로 수신
+            resp = spreadsheet.values_batch_get([
+                f"'{STOCK_SHEET}'",
+                f"'{INOUT_SHEET}'!1:1",
+                f"'{INOUT_SHEET}'!A{start + 2}:ZZ",
+            ])
+            stock_vals, io_head, io_tail = [
+                vr.get("values", []) for vr in resp.get("valueRanges", [])
+            ]
+            io_header = io_head[0] if io_head else []
+
+            if start and io_header != inout_meta["header"]:
+                # 헤더가 바뀌면 행 위치 기준이 깨지므로 입출고 전체를 다시 받음
+                print("[INFO] 입출고리스트 헤더 변경 감지 → 전체 재동기화")
+                resp = spreadsheet.values_batch_get([f"'{INOUT_SHEET}'!A2:ZZ"])
+                io_tail = resp.get("valueRanges", [{}])[0].get("values", [])
+                start = 0
+
+            with conn:
+                _store_rows(conn, STOCK_SHEET, stock_vals[0] if stock_vals else [], stock_vals[1:], 0)
+                _store_rows(conn, INOUT_SHEET, io_header, io_tail, start)
+
+            print(f"[INFO] 마스터 미러 동기화 완료: 재고 {max(len(stock_vals) - 1, 0)}행, 입출고 신규 {len(io_tail)}행")
+            return True
+        finally:
+            conn.close()
+
+
+def query_rows(sheet: str, biz_num: str, db_path: Optional[str] = None) -> pd.DataFrame:
+    """미러에서 사업자번호로 행 조회 (시트 원본 헤더 그대로, 미동기화 시 빈 DataFrame)"""
+    conn = _connect(db_path)
+    try:
+        meta = _load_meta(conn, sheet)
+        if meta is None:
+            return pd.DataFrame()
+        data = [
+            json.loads(d) for (d,) in conn.execute(
+                "SELECT data FROM sheet_rows WHERE sheet = ? AND biz_num = ? ORDER BY row_no",
+                (sheet, str(biz_num).strip())
+            )
+        ]
+    finally:
+        conn.close()
+    return pd.DataFrame(data, columns=meta["header"])
@@ -0,0 +1,18 @@
+import contextlib, os, sys
+
+import pytest
+
+# 루트의 main / google_auth_httplib2 / shipment_cache 등과 벤치마크용 stub_server 를 그대로 import
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "bench")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import stub_server
+
+
+@pytest.fixture
+def serve_stub():
+    """serve_stub(Handler) → base URL. 벤치마크와 같은 stand-in 서버(stub_server.serve), 테스트가 끝나면 종료"""
+    with contextlib.ExitStack() as stack:
+        yield lambda handler_cls: stack.enter_context(stub_server.serve(handler_cls))
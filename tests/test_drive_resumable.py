@@ -0,0 +1,164 @@
+import io, os, re, zipfile
+
+import httplib2
+import pytest
+
+import main
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ""
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class PartialStoreSession:
+    """resumable 세션 흉내: store_ratio 만큼만 저장하고 Range 헤더로 알려줌"""
+
+    def __init__(self, store_ratio=0.5):
+        self.store_ratio = store_ratio
+        self.data = bytearray()
+        self.puts = 0
+
+    def put(self, url, data, headers, timeout):
+        self.puts += 1
+        m = re.match(r"bytes (?:(\d+)-\d+|\*)/(.+)", headers["Content-Range"])
+        start, total = m.group(1), m.group(2)
+        if start is not None:
+            assert int(start) == len(self.data), "이미 저장된 위치부터 다시 보내야 함"
+            keep = data if self.puts % 3 == 0 else data[:int(len(data) * self.store_ratio)]
+            self.data += keep
+        if total != "*" and len(self.data) == int(total):
+            return FakeResponse(200, body={"id": "zip-id"})
+        return FakeResponse(308, {"Range": f"bytes=0-{len(self.data) - 1}"} if self.data else {})
+
+
+def test_resumable_writer_resends_bytes_the_server_did_not_store():
+    session = PartialStoreSession()
+    writer = main._DriveResumableWriter(session, "http://upload", chunk_size=1000)
+    payloads = {f"doc_{i}.pdf": os.urandom(3000) for i in range(5)}
+    with zipfile.ZipFile(writer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in payloads.items():
+            zf.writestr(name, data)
+
+    assert writer.finish() == {"id": "zip-id"}
+    assert writer.offset == len(session.data)
+    with zipfile.ZipFile(io.BytesIO(bytes(session.data))) as zf:
+        assert zf.testzip() is None
+        assert {n: zf.read(n) for n in zf.namelist()} == payloads
+
+
+class StalledSession:
+    def put(self, url, data, headers, timeout):
+        return FakeResponse(308)   # Range 없음: 아무것도 저장되지 않음
+
+
+def test_resumable_writer_gives_up_when_server_makes_no_progress():
+    writer = main._DriveResumableWriter(StalledSession(), "http://upload", chunk_size=10)
+    with pytest.raises(RuntimeError):
+        writer.write(b"x" * 100)
+
+
+class ThrottlingSession:
+    """두 번째 청크는 절반만 저장하고 503 → 상태 조회(bytes */*)에는 저장 위치로 응답"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.chunks = 0
+        self.queries = 0
+
+    def _stored(self):
+        return FakeResponse(308, {"Range": f"bytes=0-{len(self.data) - 1}"})
+
+    def put(self, url, data, headers, timeout):
+        if headers["Content-Range"] == "bytes */*":
+            self.queries += 1
+            return self._stored()
+        start, total = re.match(r"bytes (?:(\d+)-\d+|\*)/(.+)", headers["Content-Range"]).groups()
+        if start is not None:
+            self.chunks += 1
+            assert int(start) == len(self.data), "이미 저장된 위치부터 다시 보내야 함"
+            if self.chunks == 2:
+                self.data += data[:len(data) // 2]
+                return FakeResponse(503)
+            self.data += data
+        if total != "*" and len(self.data) == int(total):
+            return FakeResponse(200, body={"id": "zip-id"})
+        return self._stored()
+
+
+def test_resumable_writer_checks_stored_range_after_throttling(monkeypatch):
+    monkeypatch.setattr(main.GOOGLE_RATE_LIMITER, "retry_delay", lambda attempt: 0)
+    session = ThrottlingSession()
+    writer = main._DriveResumableWriter(session, "http://upload", chunk_size=1000)
+    payload = os.urandom(3500)
+    writer.write(payload)
+
+    assert writer.finish() == {"id": "zip-id"}
+    assert session.queries == 1
+    assert bytes(session.data) == payload
+
+
+class FlakyExecute:
+    """googleapiclient HttpRequest 흉내: 처음 failures 번은 status 로 실패"""
+
+    def __init__(self, status, failures=1, method="POST"):
+        self.status, self.failures, self.method = status, failures, method
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise main.HttpError(httplib2.Response({"status": self.status}), b"{}")
+        return {"id": "file-id"}
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(main.GOOGLE_RATE_LIMITER, "retry_delay", lambda attempt: 0)
+
+
+def test_multipart_create_is_retried_after_429(no_backoff):
+    request = FlakyExecute(429, failures=2)
+    assert main._execute_with_backoff(request) == {"id": "file-id"}
+    assert request.calls == 3
+
+
+def test_multipart_create_is_not_resent_after_503(no_backoff):
+    request = FlakyExecute(503)
+    with pytest.raises(main.HttpError):
+        main._execute_with_backoff(request)
+    assert request.calls == 1
+
+
+class ZipSessionStub(StalledSession):
+    """세션 생성 POST 는 처음 503, 이후 Location 응답 / 청크 PUT 은 바로 완료"""
+
+    def __init__(self):
+        self.posts = 0
+
+    def post(self, url, json, headers, timeout):
+        self.posts += 1
+        if self.posts == 1:
+            return FakeResponse(503)
+        response = FakeResponse(200, {"Location": "http://upload/session"})
+        response.raise_for_status = lambda: None
+        return response
+
+    def put(self, url, data, headers, timeout):
+        return FakeResponse(200, body={"id": "zip-id"})
+
+
+def test_zip_session_creation_is_retried_after_503(no_backoff, monkeypatch, tmp_path):
+    session = ZipSessionStub()
+    monkeypatch.setattr(main, "get_authorized_session", lambda: session)
+    doc = tmp_path / "shipment_label_document_1.pdf"
+    doc.write_bytes(b"%PDF-1.4\n")
+
+    assert main.stream_zip_to_drive([str(doc)], "shipment.zip", "folder") == "zip-id"
+    assert session.posts == 2
@@ -0,0 +1,194 @@
+import datetime, logging, socket, time
+
+import google.auth.credentials
+import httplib2
+import pytest
+
+import google_auth_httplib2
+
+
+class FailingHttp:
+    def request(self, *args, **kwargs):
+        raise socket.timeout("timed out")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    google_auth_httplib2.metrics.reset()
+    yield
+    google_auth_httplib2.metrics.reset()
+
+
+def test_transport_error_is_recorded_with_error_status():
+    authed = google_auth_httplib2.AuthorizedHttp(
+        google.auth.credentials.AnonymousCredentials(), http=FailingHttp()
+    )
+    with pytest.raises(socket.timeout):
+        authed.request("https://www.googleapis.com/drive/v3/files", "GET")
+
+    (entry,) = google_auth_httplib2.metrics.snapshot().values()
+    assert entry["requests"] == 1
+    assert entry["statuses"] == {google_auth_httplib2.ERROR_STATUS: 1}
+
+
+def test_pooled_transport_error_is_recorded_with_error_status():
+    authed = google_auth_httplib2.PooledAuthorizedHttp(
+        google.auth.credentials.AnonymousCredentials(), http_factory=FailingHttp
+    )
+    with pytest.raises(socket.timeout):
+        authed.request("https://www.googleapis.com/drive/v3/files", "GET")
+
+    (entry,) = google_auth_httplib2.metrics.snapshot().values()
+    assert entry["statuses"] == {google_auth_httplib2.ERROR_STATUS: 1}
+
+
+class ShortLivedCredentials(google.auth.credentials.Credentials):
+    """가짜 자격 증명: refresh 마다 lifetime 초짜리 토큰 발급 (lifetime=None 이면 만료 없음)"""
+
+    def __init__(self, lifetime):
+        super().__init__()
+        self.lifetime = lifetime
+        self.refreshes = 0
+
+    def refresh(self, request):
+        self.refreshes += 1
+        self.token = "token-{}".format(self.refreshes)
+        self.expiry = None
+        if self.lifetime is not None:
+            self.expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=self.lifetime)
+
+
+def _run_refresher(credentials, seconds, **kwargs):
+    refreshed = []
+    refresher = google_auth_httplib2.BackgroundRefresher(
+        credentials, request=None, on_refresh=lambda c: refreshed.append(c.token), **kwargs
+    ).start()
+    time.sleep(seconds)
+    refresher.stop()
+    refresher._thread.join(2)
+    assert not refresher._thread.is_alive()
+    return refreshed
+
+
+def test_refresher_renews_short_lived_token_before_expiry():
+    credentials = ShortLivedCredentials(lifetime=0.4)
+    refreshed = _run_refresher(credentials, 1.5, margin=0.2, retry_interval=5)
+
+    assert len(refreshed) >= 3
+    assert refreshed == ["token-{}".format(i + 1) for i in range(len(refreshed))]
+
+
+def test_refresher_stops_after_token_without_expiry(caplog):
+    credentials = ShortLivedCredentials(lifetime=None)
+    with caplog.at_level(logging.WARNING, logger=google_auth_httplib2.__name__):
+        refreshed = _run_refresher(credentials, 0.3, margin=0.2, retry_interval=0.05)
+
+    assert refreshed == ["token-1"]
+    assert not caplog.records
+
+
+def test_refresher_does_not_spin_when_lifetime_is_below_margin():
+    credentials = ShortLivedCredentials(lifetime=0.1)
+    refreshed = _run_refresher(credentials, 0.5, margin=1, retry_interval=0.2)
+
+    assert 1 <= len(refreshed) <= 4
+
+
+@pytest.mark.parametrize("status, method, headers, expected", [
+    (429, "POST", None, True),       # 쿼터 거절은 실행 전 → 어떤 요청이든 재전송
+    (429, "PATCH", None, True),
+    (429, "PUT", {"Content-Range": "bytes 0-99/*"}, True),
+    (503, "GET", None, True),
+    (503, "put", {"Content-Type": "application/json"}, True),
+    (503, "DELETE", None, True),
+    (503, "POST", None, False),
+    (503, "PATCH", None, False),
+    (503, "PUT", {"Content-Range": "bytes 0-99/*"}, False),
+    (503, "PUT", {"content-range": "bytes */1000"}, True),
+])
+def test_is_retry_safe(status, method, headers, expected):
+    assert google_auth_httplib2.is_retry_safe(status, method, headers) is expected
+
+
+class NoWaitLimiter(google_auth_httplib2.AdaptiveRateLimiter):
+    def retry_delay(self, attempt):
+        return 0
+
+
+class ThrottledOnceHttp:
+    """처음 요청만 status(기본 429), 이후 200"""
+
+    def __init__(self, status=429):
+        self.status = status
+        self.calls = []
+
+    def request(self, uri, method="GET", **kwargs):
+        self.calls.append(method)
+        status = self.status if len(self.calls) == 1 else 200
+        return httplib2.Response({"status": status}), b"{}"
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("status, method, expected_calls, expected_status", [
+    (429, "GET", 2, 200),
+    (429, "POST", 2, 200),
+    (429, "PATCH", 2, 200),
+    (503, "GET", 2, 200),
+    (503, "POST", 1, 503),
+    (503, "PATCH", 1, 503),
+])
+def test_throttled_request_retry_depends_on_status_and_method(status, method, expected_calls, expected_status):
+    http = ThrottledOnceHttp(status)
+    authed = google_auth_httplib2.AuthorizedHttp(
+        google.auth.credentials.AnonymousCredentials(), http=http, rate_limiter=NoWaitLimiter()
+    )
+    response, _ = authed.request("https://www.googleapis.com/drive/v3/files", method)
+
+    assert len(http.calls) == expected_calls
+    assert response.status == expected_status
+
+
+@pytest.mark.parametrize("status, method, expected_calls", [(429, "POST", 2), (503, "GET", 2), (503, "POST", 1)])
+def test_pooled_throttled_request_retry_depends_on_status_and_method(status, method, expected_calls):
+    http = ThrottledOnceHttp(status)
+    authed = google_auth_httplib2.PooledAuthorizedHttp(
+        google.auth.credentials.AnonymousCredentials(), http_factory=lambda: http,
+        rate_limiter=NoWaitLimiter()
+    )
+    authed.request("https://www.googleapis.com/drive/v3/files", method)
+
+    assert len(http.calls) == expected_calls
+
+
+class UnauthorizedOnceHttp(ThrottledOnceHttp):
+    """처음 요청만 401, 이후 200"""
+
+    def request(self, uri, method="GET", **kwargs):
+        self.calls.append(kwargs["headers"].get("authorization"))
+        status = 401 if len(self.calls) == 1 else 200
+        return httplib2.Response({"status": status}), b"{}"
+
+
+@pytest.mark.parametrize("pooled", [False, True])
+def test_401_refreshes_once_and_retries_with_new_token(pooled):
+    credentials = ShortLivedCredentials(lifetime=3600)
+    credentials.refresh(None)
+    http = UnauthorizedOnceHttp()
+    if pooled:
+        authed = google_auth_httplib2.PooledAuthorizedHttp(credentials, http_factory=lambda: http)
+    else:
+        authed = google_auth_httplib2.AuthorizedHttp(credentials, http=http)
+    response, _ = authed.request("https://www.googleapis.com/drive/v3/files", "GET")
+
+    assert response.status == 200
+    assert http.calls == ["Bearer token-1", "Bearer token-2"]
+
+
+def test_pooled_http_shares_the_authorized_http_request_path():
+    assert issubclass(google_auth_httplib2.PooledAuthorizedHttp, google_auth_httplib2.AuthorizedHttp)
+    assert "request" not in vars(google_auth_httplib2.PooledAuthorizedHttp)
@@ -0,0 +1,69 @@
+import datetime, threading, time
+
+import google.auth.credentials
+from google.oauth2 import service_account
+
+import google_auth_httplib2
+import main
+
+
+class FakeSigner:
+    key_id = None
+
+    def sign(self, message):
+        return b"sig"
+
+
+def make_credentials(monkeypatch, exchange_seconds=0.1):
+    """토큰 교환을 흉내 내는 서비스 계정 자격 증명 + 교환·캐시 저장 기록"""
+    exchanges, saved = [], []
+
+    def fake_refresh(self, request):
+        time.sleep(exchange_seconds)
+        exchanges.append(threading.current_thread().name)
+        self.token = "token-{}".format(len(exchanges))
+        self.expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+    monkeypatch.setattr(service_account.Credentials, "refresh", fake_refresh)
+    monkeypatch.setattr(main, "_save_cached_token", lambda creds: saved.append(creds.token))
+    creds = main._SharedRefreshCredentials(FakeSigner(), "bot@example.iam.gserviceaccount.com",
+                                           "https://oauth2.example/token", scopes=main.GOOGLE_SCOPES)
+    return creds, exchanges, saved
+
+
+def test_concurrent_refreshes_exchange_the_token_once(monkeypatch):
+    creds, exchanges, saved = make_credentials(monkeypatch)
+    threads = [threading.Thread(target=creds.refresh, args=(None,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(exchanges) == 1
+    assert creds.token == "token-1"
+    assert saved == ["token-1"]
+
+
+def test_every_refresh_is_persisted(monkeypatch):
+    creds, exchanges, saved = make_credentials(monkeypatch, exchange_seconds=0)
+    creds.refresh(None)
+    creds.refresh(None)   # 같은 스레드의 명시적 갱신 (토큰이 그대로였으므로 교환)
+
+    assert saved == ["token-1", "token-2"]
+
+
+def test_background_and_pooled_refresh_share_one_lock(monkeypatch):
+    creds, exchanges, saved = make_credentials(monkeypatch)
+    http = google_auth_httplib2.PooledAuthorizedHttp(creds, refresh_lock=main._TOKEN_REFRESH_LOCK)
+    refresher = google_auth_httplib2.BackgroundRefresher(creds, None, lock=main._TOKEN_REFRESH_LOCK)
+    assert http._refresh_lock is refresher._lock is main._TOKEN_REFRESH_LOCK
+
+    # 백그라운드 갱신이 진행 중일 때 401 로 갱신하려는 요청 → 새 토큰을 그대로 사용
+    refresher.start()
+    time.sleep(0.02)
+    http._refresh(None)
+    refresher.stop()
+    refresher._thread.join(2)
+
+    assert exchanges == [refresher._thread.name]
+    assert saved == ["token-1"]
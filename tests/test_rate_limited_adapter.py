@@ -0,0 +1,78 @@
+import socket
+
+import pytest
+import requests
+
+from stub_server import QuietHandler
+
+import main
+
+
+def throttle_first_handler(status):
+    """메서드별 첫 요청은 status(429/503), 이후 200. 받은 요청 메서드는 Handler.seen 에 기록"""
+
+    class Handler(QuietHandler):
+        seen = []
+
+        def _reply(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            reply = 200 if self.command in self.seen else status
+            self.seen.append(self.command)
+            self.send_body(reply, b"")
+
+        do_GET = do_POST = do_PUT = do_PATCH = _reply
+
+    return Handler
+
+
+def limited_session():
+    limiter = main.google_auth_httplib2.AdaptiveRateLimiter(rate=100, burst=100)
+    limiter.retry_delay = lambda attempt: 0
+    session = requests.Session()
+    session.mount("http://", main._RateLimitedAdapter(limiter))
+    return session
+
+
+@pytest.mark.parametrize("status, method, headers, expected", [
+    (429, "GET", {}, [200, 2]),
+    (429, "POST", {}, [200, 2]),     # 쿼터 거절은 실행 전 → append_rows 등 POST 도 재시도
+    (429, "PATCH", {}, [200, 2]),
+    (429, "PUT", {"Content-Range": "bytes 0-3/*"}, [200, 2]),
+    (503, "GET", {}, [200, 2]),
+    (503, "PUT", {}, [200, 2]),
+    (503, "POST", {}, [503, 1]),     # files.create 등: 이미 처리됐을 수 있음 → 중복 생성 위험
+    (503, "PATCH", {}, [503, 1]),
+    (503, "PUT", {"Content-Range": "bytes 0-3/*"}, [503, 1]),   # resumable 청크: 호출 측이 저장 위치 확인 후 재전송
+])
+def test_adapter_retry_depends_on_status_and_method(serve_stub, status, method, headers, expected):
+    handler = throttle_first_handler(status)
+    url = serve_stub(handler)
+    r = limited_session().request(method, url, data=b"data", headers=headers)
+    assert [r.status_code, len(handler.seen)] == expected
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_adapter_records_every_round_trip_in_api_metrics(serve_stub):
+    metrics = main.google_auth_httplib2.metrics
+    metrics.reset()
+    try:
+        url = serve_stub(throttle_first_handler(429))
+        session = limited_session()
+        session.get(url + "/v4/spreadsheets/1AbCdEfGhIjKlMnOpQrStUv/values/A1")
+        closed_port = unused_port()
+        with pytest.raises(requests.ConnectionError):   # 아무도 듣지 않는 포트 → 연결 실패
+            session.post(f"http://127.0.0.1:{closed_port}/", data=b"x")
+
+        snapshot = metrics.snapshot()
+        host = url.split("//", 1)[1]
+        assert snapshot[f"GET {host}/v4/spreadsheets/{{id}}/values/A1"]["statuses"] == {429: 1, 200: 1}
+        assert snapshot[f"POST 127.0.0.1:{closed_port}/"]["statuses"] == {
+            main.google_auth_httplib2.ERROR_STATUS: 1
+        }
+    finally:
+        metrics.reset()
@@ -0,0 +1,108 @@
+import os
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from stub_server import QuietHandler
+
+import main
+import shipment_cache
+
+LABEL, MANIFEST = (prefix for prefix, _ in main.SHIPMENT_PDF_ENDPOINTS)
+PDF_BODY = b"%PDF-1.4\n% fake label\n"
+
+
+class PortalStubHandler(QuietHandler):
+    """
+    포털 PDF 생성 URL 흉내 (parcelShipmentSeq 로 응답 결정):
+      1001 → 라벨·매니페스트 모두 PDF (Content-Disposition 의 UTF-8 파일명)
+      1002 → PDF 지만 파일명 헤더 없음
+      1003 → 라벨은 PDF, 매니페스트는 로그인 HTML (세션 만료)
+    """
+    cookies = []
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        shipment_no = parse_qs(url.query)["parcelShipmentSeq"][0]
+        prefix = next(p for p, path in main.SHIPMENT_PDF_ENDPOINTS if path == url.path)
+        self.cookies.append(self.headers.get("Cookie", ""))
+
+        headers = {"Content-Type": "application/pdf"}
+        body = PDF_BODY
+        if shipment_no == "1001":
+            headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{prefix}_1001%20%EC%B6%9C%EA%B3%A0.pdf"
+        elif shipment_no == "1003" and prefix == MANIFEST:
+            headers = {"Content-Type": "text/html; charset=UTF-8"}
+            body = b"<html><body>login</body></html>"
+
+        content_type = headers.pop("Content-Type")
+        self.send_body(200, body, content_type, headers)
+
+
+class FakeDriver:
+    def execute_script(self, script):
+        return "Mozilla/5.0 (stub)"
+
+    def get_cookies(self):
+        return [{"name": "SESSION", "value": "abc", "domain": "127.0.0.1", "path": "/"}]
+
+
+@pytest.fixture
+def fetch(tmp_path, monkeypatch, serve_stub):
+    db_path = str(tmp_path / "shipment_cache.db")
+    monkeypatch.setattr(shipment_cache, "get_db_path", lambda: db_path)
+    target_dir = tmp_path / "shipment"
+    target_dir.mkdir()
+
+    PortalStubHandler.cookies = []
+    base = serve_stub(PortalStubHandler)
+
+    def run(*shipment_nos):
+        saved = []
+        fetcher = main.ShipmentPdfFetcher(FakeDriver(), str(target_dir), workers=2, on_saved=saved.append,
+                                          base_url=base, timeout=5, retries=0)
+        for shipment_no in shipment_nos:
+            fetcher.submit(shipment_no)
+        failed = fetcher.close()
+        return sorted(os.path.basename(p) for p in saved), sorted(failed)
+
+    return run
+
+
+def test_pdf_saved_under_content_disposition_filename(fetch, tmp_path):
+    saved, failed = fetch("1001")
+
+    assert failed == []
+    assert saved == [f"{LABEL}_1001 출고.pdf", f"{MANIFEST}_1001 출고.pdf"]
+    assert (tmp_path / "shipment" / saved[0]).read_bytes() == PDF_BODY
+    assert PortalStubHandler.cookies == ["SESSION=abc"] * 2   # 브라우저 쿠키로 인증
+    assert shipment_cache.saved_docs(["1001"]) == {"1001": {LABEL: saved[0], MANIFEST: saved[1]}}
+
+
+def test_pdf_without_filename_header_gets_default_name(fetch):
+    saved, failed = fetch("1002")
+
+    assert failed == []
+    assert saved == [f"{LABEL}_1002.pdf", f"{MANIFEST}_1002.pdf"]
+
+
+def test_login_page_is_reported_per_document(fetch, tmp_path):
+    saved, failed = fetch("1003")
+
+    assert saved == [f"{LABEL}_1003.pdf"]
+    assert failed == [("1003", MANIFEST)]   # 라벨은 받았으므로 매니페스트만 대체 경로로
+    assert not any(name.endswith(".part") for name in os.listdir(tmp_path / "shipment"))
+    assert shipment_cache.saved_docs(["1003"]) == {"1003": {LABEL: f"{LABEL}_1003.pdf"}}
+
+
+def test_invalidate_keeps_checkpoint_of_received_document(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    shipment_cache.store({"PO1": ("1003", "center", "2026-10-20")}, db_path=db_path)
+    shipment_cache.mark_doc("1003", LABEL, "label.pdf", db_path=db_path)
+    shipment_cache.mark_doc("1003", MANIFEST, "stale.pdf", db_path=db_path)
+
+    shipment_cache.invalidate(["1003"], docs=False, db_path=db_path)
+    shipment_cache.drop_docs([("1003", MANIFEST)], db_path=db_path)
+
+    assert shipment_cache.saved_docs(["1003"], db_path=db_path) == {"1003": {LABEL: "label.pdf"}}
+    assert shipment_cache.lookup({"PO1": ("center", "2026-10-20")}, db_path=db_path) == {}
@@ -0,0 +1,249 @@
+import threading, time, types
+
+import pytest
+
+import main
+
+HEADER = ["쉽먼트번호", "발주번호", "물류센터", "수량", "입고예정일"]
+
+
+class ListPageDriver:
+    """Shipments 목록 흉내: pages[i] = {"header": [...], "rows": [[...], ...]}, 다음 페이지 버튼으로 넘김"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.page = 0
+        self.scripts = 0
+
+    def find_element(self, by, selector):
+        return object()
+
+    def find_elements(self, by, selector):
+        if selector == main.SHIPMENT_NEXT_PAGE_CSS:
+            return [NextButton(self)] if self.page + 1 < len(self.pages) else []
+        return []
+
+    def execute_script(self, script):
+        self.scripts += 1
+        return self.pages[self.page]
+
+
+class NextButton:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def click(self):
+        self.driver.page += 1
+
+
+def test_bulk_matches_only_the_po_column():
+    driver = ListPageDriver([
+        {"header": HEADER, "rows": [
+            ["S-1", "111", "센터 222", "333", "2026-10-20"],   # 222·333 은 다른 칸의 숫자
+            ["S-2", "222\n444", "센터", "1", "2026-10-21"],     # 발주 여러 건
+        ]},
+        {"header": HEADER, "rows": [["S-3", "333", "센터", "5", "2026-10-22"]]},
+    ])
+    found = main.resolve_shipments_bulk(driver, ["111", "222", "333", "444"])
+
+    assert found == {"111": "S-1", "222": "S-2", "444": "S-2", "333": "S-3"}
+
+
+def test_bulk_stops_when_all_found():
+    driver = ListPageDriver([
+        {"header": HEADER, "rows": [["S-1", "111", "센터", "1", ""]]},
+        {"header": HEADER, "rows": [["S-9", "999", "센터", "1", ""]]},
+    ])
+    assert main.resolve_shipments_bulk(driver, ["111"]) == {"111": "S-1"}
+    assert driver.scripts == 1
+
+
+@pytest.mark.parametrize("header", [["쉽먼트번호", "물류센터", "수량"], []])
+def test_bulk_stops_on_first_page_without_po_column(header):
+    driver = ListPageDriver([
+        {"header": header, "rows": [["S-1", "111", "1"]]},
+        {"header": header, "rows": [["S-2", "222", "1"]]},
+    ])
+    assert main.resolve_shipments_bulk(driver, ["111", "222"]) == {}
+    assert driver.scripts == 1 and driver.page == 0
+
+
+def test_po_column_from_header():
+    assert main._po_column(["Shipment No", "PO No.", "Qty"]) == 1
+    assert main._po_column(["쉽먼트번호", "센터", "발주 번호"]) == 2
+    assert main._po_column(["쉽먼트번호", "POS", "수량"]) is None
+
+
+class FakeCell:
+    def __init__(self, text, colspan=None):
+        self.text = text
+        self._colspan = colspan
+
+    def get_attribute(self, name):
+        return self._colspan if name == "colspan" else None
+
+
+class FakeRow:
+    """같은 객체의 칸을 바꾸면 화면이 행을 재사용해 내용만 갱신한 것과 같음"""
+
+    def __init__(self, *cells):
+        self.cells = list(cells)
+
+    @property
+    def text(self):
+        return " ".join(c.text for c in self.cells)
+
+    def find_elements(self, by, tag):
+        return self.cells
+
+
+class ResultTableDriver:
+    def __init__(self, *rows):
+        self.rows = list(rows)
+
+    def find_elements(self, by, selector):
+        return self.rows
+
+
+def result_row(shipment_no, po_text):
+    return FakeRow(FakeCell(shipment_no), FakeCell(po_text), FakeCell("센터"), FakeCell("12"))
+
+
+def no_result_row():
+    return FakeRow(FakeCell("조회 결과가 없습니다.", colspan="8"))
+
+
+def condition_for(po_no, driver, **kwargs):
+    old = driver.rows[0] if driver.rows else None
+    return main._search_result(po_no, old, old.text if old else None, **kwargs)
+
+
+def test_search_result_detects_in_place_update():
+    row = result_row("S-1", "111")
+    driver = ResultTableDriver(row)
+    cond = condition_for("222", driver)
+    assert cond(driver) is False           # 아직 이전 결과
+
+    row.cells = result_row("S-2", "999").cells   # 같은 행 요소에 새 결과
+    assert cond(driver) == ["S-2"]
+
+
+def test_search_result_accepts_unchanged_row_for_shared_shipment():
+    driver = ResultTableDriver(result_row("S-1", "111\n222"))   # 연속한 두 발주가 같은 쉽먼트
+    assert condition_for("222", driver)(driver) == ["S-1"]
+
+
+def test_search_result_does_not_match_po_as_substring():
+    driver = ResultTableDriver(result_row("S-1", "11122"))
+    assert condition_for("222", driver)(driver) is False
+
+
+def test_search_result_new_row_and_no_result_row():
+    driver = ResultTableDriver(result_row("S-1", "111"))
+    cond = condition_for("333", driver)
+    driver.rows = [result_row("S-3", "")]
+    assert cond(driver) == ["S-3"]
+    driver.rows = [no_result_row()]
+    assert cond(driver) == [""]
+    driver.rows = []
+    assert cond(driver) is False
+
+
+def test_unchanged_no_result_row_waits_for_grace_period():
+    driver = ResultTableDriver(no_result_row())
+    cond = condition_for("444", driver, grace=0.2)
+    assert cond(driver) is False
+    time.sleep(0.25)
+    assert cond(driver) == [""]
+
+
+class FakeInput:
+    def clear(self):
+        pass
+
+    def send_keys(self, text):
+        pass
+
+
+class SearchPageDriver(ResultTableDriver):
+    """검색 버튼을 눌러도 결과 표가 바뀌지 않는 화면 (포털 응답 지연)"""
+
+    def find_element(self, by, selector):
+        return self
+
+    def click(self):
+        pass
+
+
+def test_search_timeout_raises_instead_of_returning_no_shipment(monkeypatch):
+    monkeypatch.setattr(main, "waits", main.WaitPolicy({"search_result": (0.2, 0.05)}))
+    driver = SearchPageDriver(result_row("S-1", "111"))
+    with pytest.raises(main.TimeoutException):
+        main.search_shipment(driver, FakeInput(), "222")
+
+
+def test_pool_retries_timeouts_and_reports_them_as_failed(monkeypatch):
+    calls = []
+
+    def fake_search(driver, search_input, po_no):
+        calls.append(po_no)
+        if po_no == "1":
+            raise main.TimeoutException("검색 결과가 10초 안에 나타나지 않음")
+        return {"2": "", "3": "S-3"}[po_no]
+
+    monkeypatch.setattr(main, "search_shipment", fake_search)
+    monkeypatch.setattr(main, "open_shipment_search", lambda driver: FakeInput())
+    done = []
+    pool = main.ShipmentSearchPool(object(), FakeInput(), make_driver=None, workers=1, retries=2,
+                                   on_done=lambda n, po_no, shipment_no: done.append((po_no, shipment_no)))
+
+    assert pool.search_all(["1", "2", "3"]) == {"1": "", "2": "", "3": "S-3"}
+    assert calls.count("1") == 3            # 최초 1회 + 재시도 2회
+    assert pool.failed == ["1"]             # '결과 없음'(2) 은 실패가 아님
+    assert sorted(done) == [("1", ""), ("2", ""), ("3", "S-3")]
+
+
+class CdpDriver:
+    """execute_cdp_cmd 를 부른 스레드를 기록 (WebDriver 는 스레드 안전하지 않음)"""
+
+    def __init__(self):
+        self.calls = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.calls.append((cmd, threading.current_thread().name))
+        return {"cookies": [{"name": "SESSION", "value": "abc"}]}
+
+    def quit(self):
+        pass
+
+
+def test_pool_reads_main_cookies_once_on_calling_thread(monkeypatch):
+    monkeypatch.setattr(main, "search_shipment", lambda driver, search_input, po_no: "S-" + po_no)
+    monkeypatch.setattr(main, "open_shipment_search", lambda driver: FakeInput())
+    main_driver, extra = CdpDriver(), []
+
+    def make_driver():
+        extra.append(CdpDriver())
+        return extra[-1]
+
+    pool = main.ShipmentSearchPool(main_driver, FakeInput(), make_driver, workers=3)
+    po_numbers = [str(i) for i in range(3 * main.CRAWL_POS_PER_WORKER)]
+
+    assert pool.search_all(po_numbers) == {po: "S-" + po for po in po_numbers}
+    assert main_driver.calls == [("Network.getAllCookies", threading.current_thread().name)]
+    assert len(extra) == 2
+    assert all([cmd for cmd, _ in d.calls] == ["Network.setCookies"] for d in extra)
+
+
+def test_relaunch_headless_moves_login_cookies_and_quits_visible_browser(monkeypatch):
+    quit_calls = []
+    visible, headless = CdpDriver(), CdpDriver()
+    visible.quit = lambda: quit_calls.append("visible")
+    monkeypatch.setattr(main.webdriver, "Chrome", lambda options: headless)
+    app = types.SimpleNamespace(driver=visible, _chrome_options=lambda light: light)
+
+    assert main.OrderApp._relaunch_headless(app) is headless
+    assert app.driver is headless
+    assert [cmd for cmd, _ in visible.calls] == ["Network.getAllCookies"]
+    assert [cmd for cmd, _ in headless.calls] == ["Network.setCookies"]
+    assert quit_calls == ["visible"]